@@ -0,0 +1,61 @@
+# bytes per entity and construction throughput of entities and worlds, run with python -m benchmarks.memory
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+
+
+def make_entities(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    entities = []
+    for i in range(count):
+        x = rng.uniform(0.0, 1000.0)
+        y = rng.uniform(0.0, 1000.0)
+        entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), i % 4))
+    return entities
+
+
+# bytes allocated per entity, excluding the name strings
+def bytes_per_entity(count: int):
+    names = [str(i) for i in range(count)]
+    coordinates = [(float(i), float(i)) for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [Entity(name, Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), 0)
+                for name, (x, y) in zip(names, coordinates)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # exclude the list holding the entities
+    return (after - before - entities.__sizeof__()) / count
+
+
+# entities constructed per second
+def entity_throughput(count: int):
+    start = time.perf_counter()
+    make_entities(count)
+    return count / (time.perf_counter() - start)
+
+
+# entities added to a world per second
+def world_throughput(count: int):
+    entities = make_entities(count)
+    start = time.perf_counter()
+    World(entities)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='bytes per entity and construction throughput')
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+    print('bytes per entity:      %.1f' % bytes_per_entity(args.count))
+    print('entities per second:   %.0f' % entity_throughput(args.count))
+    print('world adds per second: %.0f' % world_throughput(args.count))
+
+
+if __name__ == '__main__':
+    main()
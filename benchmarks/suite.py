@@ -0,0 +1,193 @@
+# timings of geometry and world hot paths, run with python -m benchmarks.suite
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from spacial.geometry import Line, Rectangle, Vector
+from spacial.world import Entity, World
+
+
+tolerance: float = 1e-7
+
+# number of operations timed per geometry case and per world query case
+geometry_ops = 20000
+query_ops = 1000
+
+
+# random corners of count rectangles, spread uniformly or in gaussian clusters over a square
+def make_corners(count: int, distribution: str, seed: int = 0):
+    rng = random.Random(seed)
+    side = count ** 0.5 * 10.0
+    if distribution == 'uniform':
+        points = [(rng.uniform(0.0, side), rng.uniform(0.0, side)) for _ in range(count)]
+    elif distribution == 'clustered':
+        centres = [(rng.uniform(0.0, side), rng.uniform(0.0, side)) for _ in range(max(1, count // 1000))]
+        points = []
+        for _ in range(count):
+            cx, cy = rng.choice(centres)
+            points.append((rng.gauss(cx, side / 100.0), rng.gauss(cy, side / 100.0)))
+    else:
+        raise ValueError('unknown distribution ' + distribution)
+    return [(x, y, x + rng.uniform(0.5, 5.0), y + rng.uniform(0.5, 5.0)) for x, y in points]
+
+
+def make_entities(corners: list):
+    return [Entity(str(i), Rectangle(Vector(x0, y0), Vector(x1, y1)), i % 4)
+            for i, (x0, y0, x1, y1) in enumerate(corners)]
+
+
+def make_lines(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [Line(Vector(rng.uniform(0.0, 10.0), rng.uniform(0.0, 10.0)),
+                 Vector(rng.uniform(0.0, 10.0), rng.uniform(0.0, 10.0))) for _ in range(count)]
+
+
+# seconds taken by the operation
+def timed(operation):
+    start = time.perf_counter()
+    operation()
+    return time.perf_counter() - start
+
+
+def rectangle_construction():
+    corners = [(Vector(x0, y0), Vector(x1, y1)) for x0, y0, x1, y1 in make_corners(geometry_ops, 'uniform')]
+    return geometry_ops, timed(lambda: [Rectangle(a, b) for a, b in corners])
+
+
+def rectangle_intersections_with():
+    rectangles = [Rectangle(Vector(x0, y0), Vector(x1, y1))
+                  for x0, y0, x1, y1 in make_corners(geometry_ops, 'uniform')]
+    lines = make_lines(geometry_ops)
+    return geometry_ops, timed(lambda: [r.intersections_with(ln, tolerance) for r, ln in zip(rectangles, lines)])
+
+
+def rectangle_clip():
+    rectangles = [Rectangle(Vector(x0, y0), Vector(x1, y1))
+                  for x0, y0, x1, y1 in make_corners(geometry_ops, 'uniform')]
+    lines = make_lines(geometry_ops)
+    return geometry_ops, timed(lambda: [r.clip(ln, tolerance) for r, ln in zip(rectangles, lines)])
+
+
+def line_intersection_with():
+    lines = make_lines(geometry_ops + 1)
+    return geometry_ops, timed(lambda: [a.intersection_with(b, tolerance, True) for a, b in zip(lines, lines[1:])])
+
+
+def line_contains():
+    lines = make_lines(geometry_ops)
+    points = [ln.start_point + (ln.end_point - ln.start_point) * 0.5 for ln in lines]
+    return geometry_ops, timed(lambda: [ln.contains(p, tolerance, True) for ln, p in zip(lines, points)])
+
+
+geometry_cases = {
+    'rectangle_construction': rectangle_construction,
+    'rectangle_intersections_with': rectangle_intersections_with,
+    'rectangle_clip': rectangle_clip,
+    'line_intersection_with': line_intersection_with,
+    'line_contains': line_contains,
+}
+
+
+def world_construction(entities: list, rng: random.Random):
+    return len(entities), timed(lambda: World(entities))
+
+
+def world_find(entities: list, rng: random.Random):
+    w = World(entities)
+    names = [rng.choice(entities).name for _ in range(query_ops)]
+    return query_ops, timed(lambda: [w.find(name) for name in names])
+
+
+def world_find_near_to(entities: list, rng: random.Random):
+    w = World(entities)
+    targets = [rng.choice(entities) for _ in range(query_ops)]
+    # exclude building the index for the tolerance from the timing
+    w.find_near_to(targets[0], 0.5)
+    return query_ops, timed(lambda: [w.find_near_to(target, 0.5) for target in targets])
+
+
+def world_remove(entities: list, rng: random.Random):
+    w = World(entities)
+    w.find_near_to(entities[0], 0.5)
+    names = [e.name for e in rng.sample(entities, min(query_ops, len(entities)))]
+    return len(names), timed(lambda: [w.remove(name) for name in names])
+
+
+world_cases = {
+    'construction': world_construction,
+    'find': world_find,
+    'find_near_to': world_find_near_to,
+    'remove': world_remove,
+}
+
+
+# best seconds per operation of each case over the repeats
+def run(sizes: list, distributions: list, repeat: int, selected: str = None):
+    results = {}
+
+    def record(name: str, case):
+        if selected is not None and selected not in name:
+            return
+        results[name] = min(ops_and_seconds[1] / ops_and_seconds[0]
+                            for ops_and_seconds in [case() for _ in range(repeat)])
+        print('%-50s %12.3f us/op' % (name, results[name] * 1e6), file=sys.stderr)
+
+    for name, case in geometry_cases.items():
+        record('geometry.' + name, case)
+    for distribution in distributions:
+        for size in sizes:
+            entities = make_entities(make_corners(size, distribution))
+            for name, case in world_cases.items():
+                record('world.%s.%s.%d' % (name, distribution, size),
+                       lambda: case(entities, random.Random(size)))
+    return results
+
+
+# cases slower than the baseline by more than the threshold fraction, as (name, baseline, current) tuples
+def regressions(baseline: dict, current: dict, threshold: float):
+    return [(name, baseline[name], seconds)
+            for name, seconds in current.items()
+            if name in baseline and seconds > baseline[name] * (1.0 + threshold)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='time geometry and world hot paths')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--distributions', nargs='+', default=['uniform', 'clustered'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--select', help='only run cases whose name contains this text')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results to compare against, exiting with 1 on regression')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='fraction by which a case may be slower than the comparison (default 0.1)')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.distributions, args.repeat, args.select)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seconds_per_op': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['seconds_per_op']
+        slower = regressions(baseline, results, args.threshold)
+        for name, before, after in slower:
+            print('REGRESSION %s: %.3f -> %.3f us/op (%+.0f%%)' % (
+                name, before * 1e6, after * 1e6, (after / before - 1.0) * 100.0), file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
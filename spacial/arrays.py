@@ -0,0 +1,189 @@
+from typing import Iterable, Union
+import numpy as np
+from spacial.geometry import Line, Rectangle, Vector
+
+
+# points are on or within the boundaries of rectangles, either of which may be arrays
+def _contains(bounds, point, tolerance: float):
+    return ((bounds.bottom_left.x - tolerance <= point.x) & (point.x <= bounds.top_right.x + tolerance) &
+            (bounds.bottom_left.y - tolerance <= point.y) & (point.y <= bounds.top_right.y + tolerance))
+
+
+# represents many 2-dimensional vectors as contiguous x and y arrays
+class VectorArray:
+    def __init__(self, x, y):
+        self.x = np.ascontiguousarray(x, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+
+    @staticmethod
+    def from_vectors(vectors: Iterable[Vector]):
+        vectors = list(vectors)
+        return VectorArray([v.x for v in vectors], [v.y for v in vectors])
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, i: int):
+        return Vector(float(self.x[i]), float(self.y[i]))
+
+    def __iter__(self):
+        return (Vector(x, y) for x, y in zip(self.x.tolist(), self.y.tolist()))
+
+    def __add__(self, other: Union['VectorArray', Vector]):
+        return VectorArray(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other: Union['VectorArray', Vector]):
+        return VectorArray(self.x - other.x, self.y - other.y)
+
+    def __neg__(self):
+        return VectorArray(-self.x, -self.y)
+
+    def __mul__(self, factor):
+        return VectorArray(self.x * factor, self.y * factor)
+
+    def __truediv__(self, factor):
+        return VectorArray(self.x / factor, self.y / factor)
+
+    def equals(self, other: Union['VectorArray', Vector], tolerance: float):
+        return (np.abs(self.x - other.x) <= tolerance) & (np.abs(self.y - other.y) < tolerance)
+
+    def dot(self, other: Union['VectorArray', Vector]):
+        return self.x * other.x + self.y * other.y
+
+    def magnitude(self):
+        return np.sqrt(self.dot(self))
+
+
+# represents many 2-dimensional rectangles as contiguous corner arrays
+class RectangleArray:
+    def __init__(self, from_points: VectorArray, to_points: VectorArray):
+        self.bottom_left = VectorArray(np.minimum(from_points.x, to_points.x), np.minimum(from_points.y, to_points.y))
+        self.top_right = VectorArray(np.maximum(from_points.x, to_points.x), np.maximum(from_points.y, to_points.y))
+
+    @staticmethod
+    def from_rectangles(rectangles: Iterable[Rectangle]):
+        rectangles = list(rectangles)
+        return RectangleArray(VectorArray.from_vectors(r.bottom_left for r in rectangles),
+                              VectorArray.from_vectors(r.top_right for r in rectangles))
+
+    def __len__(self):
+        return len(self.bottom_left)
+
+    def __getitem__(self, i: int):
+        return Rectangle(self.bottom_left[i], self.top_right[i])
+
+    def __iter__(self):
+        return (Rectangle(bl, tr) for bl, tr in zip(self.bottom_left, self.top_right))
+
+    def __add__(self, other: Union[VectorArray, Vector]):
+        return RectangleArray(self.bottom_left + other, self.top_right + other)
+
+    def __sub__(self, other: Union[VectorArray, Vector]):
+        return RectangleArray(self.bottom_left - other, self.top_right - other)
+
+    def __mul__(self, factor):
+        return RectangleArray(self.bottom_left * factor, self.top_right * factor)
+
+    def __truediv__(self, factor):
+        return RectangleArray(self.bottom_left / factor, self.top_right / factor)
+
+    def equals(self, other: Union['RectangleArray', Rectangle], tolerance: float):
+        return self.bottom_left.equals(other.bottom_left, tolerance) & self.top_right.equals(other.top_right, tolerance)
+
+    # centre points of the rectangles
+    def centre(self):
+        return VectorArray((self.bottom_left.x + self.top_right.x) / 2.0, (self.bottom_left.y + self.top_right.y) / 2.0)
+
+    # points are on or within the boundaries
+    def contains(self, point: Union[VectorArray, Vector], tolerance: float):
+        return _contains(self, point, tolerance)
+
+    # other rectangles are on or within the boundaries at some point
+    def overlaps(self, other: Union['RectangleArray', Rectangle], tolerance: float):
+        return ((self.bottom_left.x - tolerance <= other.top_right.x) &
+                (other.bottom_left.x <= self.top_right.x + tolerance) &
+                (self.bottom_left.y - tolerance <= other.top_right.y) &
+                (other.bottom_left.y <= self.top_right.y + tolerance))
+
+
+# represents many lines between pairs of 2-dimensional points
+class LineArray:
+    def __init__(self, start_point: VectorArray, end_point: VectorArray):
+        self.start_point = start_point
+        self.end_point = end_point
+        self.bounds = RectangleArray(start_point, end_point)
+        direction = end_point - start_point
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.unit_direction = direction / direction.magnitude()
+
+    @staticmethod
+    def from_lines(lines: Iterable[Line]):
+        lines = list(lines)
+        return LineArray(VectorArray.from_vectors(ln.start_point for ln in lines),
+                         VectorArray.from_vectors(ln.end_point for ln in lines))
+
+    def __len__(self):
+        return len(self.start_point)
+
+    def __getitem__(self, i: int):
+        return Line(self.start_point[i], self.end_point[i])
+
+    def __iter__(self):
+        return (Line(s, e) for s, e in zip(self.start_point, self.end_point))
+
+    def take(self, indices):
+        return LineArray(VectorArray(self.start_point.x[indices], self.start_point.y[indices]),
+                         VectorArray(self.end_point.x[indices], self.end_point.y[indices]))
+
+    def is_parallel_to(self, other: Union['LineArray', Line], tolerance: float):
+        return 1.0 - np.abs(self.unit_direction.dot(other.unit_direction)) < tolerance
+
+    # intersections with the corresponding other lines and a mask of those that are valid
+    def intersection_with(self, other: Union['LineArray', Line], tolerance: float, bounded: bool):
+        u = self.unit_direction
+        v = other.unit_direction
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # first row of the inverse of the direction matrix applied to the start point offset
+            d = u.x * v.y - v.x * u.y
+            offset = -(self.start_point - other.start_point)
+            lamb = (v.y / d) * offset.x + (-v.x / d) * offset.y
+            intersections = self.start_point + u * lamb
+        valid = ~self.is_parallel_to(other, tolerance) & np.isfinite(intersections.x) & np.isfinite(intersections.y)
+        if bounded:
+            valid &= (_contains(self.bounds, intersections, tolerance) &
+                      _contains(other.bounds, intersections, tolerance))
+        return intersections, valid
+
+    # parameters (t0, t1) from the starts (0) to the ends (1) where the lines enter and leave the corresponding
+    # rectangles, or a single rectangle, widened by the tolerance, and a mask of the lines that do not miss
+    def clip(self, bounds: Union[RectangleArray, Rectangle], tolerance: float):
+        sx = self.start_point.x
+        sy = self.start_point.y
+        dx = self.end_point.x - sx
+        dy = self.end_point.y - sy
+        shape = np.broadcast(sx, bounds.bottom_left.x).shape
+        t0 = np.zeros(shape)
+        t1 = np.ones(shape)
+        valid = np.ones(shape, dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for p, q in ((-dx, sx - (bounds.bottom_left.x - tolerance)), (dx, bounds.top_right.x + tolerance - sx),
+                         (-dy, sy - (bounds.bottom_left.y - tolerance)), (dy, bounds.top_right.y + tolerance - sy)):
+                t = q / p
+                # lines parallel to a side miss if outside it
+                valid &= (p != 0.0) | (q >= 0.0)
+                t0 = np.where(p < 0.0, np.maximum(t0, t), t0)
+                t1 = np.where(p > 0.0, np.minimum(t1, t), t1)
+        return t0, t1, valid & (t0 <= t1)
+
+    # parts of the lines on or within the corresponding rectangles, or a single rectangle, widened by the tolerance,
+    # and a mask of those that do not miss
+    def clipped(self, bounds: Union[RectangleArray, Rectangle], tolerance: float):
+        t0, t1, valid = self.clip(bounds, tolerance)
+        direction = self.end_point - self.start_point
+        return LineArray(self.start_point + direction * t0, self.start_point + direction * t1), valid
+
+    # valid intersections between every pair of lines (i, j) where i < j, as index arrays and points
+    def intersections(self, tolerance: float, bounded: bool):
+        first, second = np.triu_indices(len(self), 1)
+        intersections, valid = self.take(first).intersection_with(self.take(second), tolerance, bounded)
+        return first[valid], second[valid], VectorArray(intersections.x[valid], intersections.y[valid])
@@ -0,0 +1,90 @@
+from typing import Callable, Iterable
+from array import array
+from itertools import islice
+import csv
+import json
+from spacial import snapshot
+from spacial.geometry import Vector
+from spacial.rtree import RTree
+
+
+# represents a world under construction from raw (name, x0, y0, x1, y1, layer) rows, held as columns
+class WorldBuilder:
+    def __init__(self, chunk_size: int = 100000, progress: Callable[[int], None] = None):
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.rows_read = 0
+        self._rows = {}
+        self._names = []
+        self._bounds = array('d')
+        self._layers = array('i')
+
+    def __len__(self):
+        return len(self._names)
+
+    # add a chunk of rows, a later row replacing an earlier one of the same name in its position
+    def _add_chunk(self, rows: list):
+        rows_of = self._rows
+        bounds = self._bounds
+        layers = self._layers
+        for name, x0, y0, x1, y1, layer in rows:
+            x0 = float(x0)
+            y0 = float(y0)
+            x1 = float(x1)
+            y1 = float(y1)
+            corners = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+            row = rows_of.get(name)
+            if row is None:
+                rows_of[name] = len(self._names)
+                self._names.append(name)
+                bounds.extend(corners)
+                layers.append(int(layer))
+            else:
+                bounds[4 * row:4 * row + 4] = array('d', corners)
+                layers[row] = int(layer)
+        self.rows_read += len(rows)
+        if self.progress is not None:
+            self.progress(self.rows_read)
+
+    # add (name, x0, y0, x1, y1, layer) rows, consuming them in chunks
+    def add_rows(self, rows: Iterable[tuple]):
+        rows = iter(rows)
+        chunk = list(islice(rows, self.chunk_size))
+        while chunk:
+            self._add_chunk(chunk)
+            chunk = list(islice(rows, self.chunk_size))
+        return self
+
+    # add rows of comma separated name, x0, y0, x1, y1, layer, skipping a first header line if present
+    def add_csv(self, lines: Iterable[str], header: bool = False):
+        reader = csv.reader(lines)
+        if header:
+            next(reader, None)
+        return self.add_rows(row for row in reader if row)
+
+    # add rows of JSON objects with name, x0, y0, x1, y1 and layer fields, one per line
+    def add_ndjson(self, lines: Iterable[str]):
+        return self.add_rows((r['name'], r['x0'], r['y0'], r['x1'], r['y1'], r['layer'])
+                             for r in (json.loads(line) for line in lines if line.strip()))
+
+    # write the rows added so far as a snapshot file
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            snapshot.write(f, self._names, self._bounds, self._layers)
+
+    # world of the rows added so far, read from their columns as a snapshot is, with its insertion order, centres,
+    # layers and R-tree packed in bulk from the columns, so that no entity is created until a query returns it
+    def build(self):
+        world = snapshot.from_image(snapshot.encode(self._names, self._bounds, self._layers))
+        names = self._names
+        bounds = self._bounds
+        world._order = {name: i for i, name in enumerate(names)}
+        world._next_order = len(names)
+        world._centres = {name: Vector((bounds[4 * i] + bounds[4 * i + 2]) / 2.0,
+                                       (bounds[4 * i + 1] + bounds[4 * i + 3]) / 2.0)
+                          for i, name in enumerate(names)}
+        layers = world._layers = {}
+        for name, layer in zip(names, self._layers):
+            layers.setdefault(layer, set()).add(name)
+        world._tree = RTree.packed(names, bounds)
+        return world
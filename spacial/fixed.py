@@ -0,0 +1,71 @@
+# exact predicates on coordinates snapped to integer multiples of a resolution
+from typing import Tuple
+from math import floor
+from spacial.geometry import Rectangle, Vector
+
+
+# nearest integer multiple, halves rounded up so that snapping commutes with moves by whole multiples
+def snap(value: float, resolution: float):
+    return floor(value / resolution + 0.5)
+
+
+# integer (x, y) of the point
+def snap_vector(v: Vector, resolution: float):
+    return snap(v.x, resolution), snap(v.y, resolution)
+
+
+# integer (x0, y0, x1, y1) corners of the rectangle
+def snap_rectangle(r: Rectangle, resolution: float):
+    return (snap(r.bottom_left.x, resolution), snap(r.bottom_left.y, resolution),
+            snap(r.top_right.x, resolution), snap(r.top_right.y, resolution))
+
+
+# rectangle of integer corners
+def rectangle_of(corners: Tuple[int, int, int, int], resolution: float):
+    x0, y0, x1, y1 = corners
+    return Rectangle(Vector(x0 * resolution, y0 * resolution), Vector(x1 * resolution, y1 * resolution))
+
+
+# twice the centre of integer corners, which is itself integer and so usable as an exact key
+def centre_key(corners: Tuple[int, int, int, int]):
+    x0, y0, x1, y1 = corners
+    return x0 + x1, y0 + y1
+
+
+# point is on or within the boundary of the integer corners
+def contains(corners: Tuple[int, int, int, int], point: Tuple[int, int]):
+    x0, y0, x1, y1 = corners
+    x, y = point
+    return x0 <= x <= x1 and y0 <= y <= y1
+
+
+# 1 if a, b, c turn anticlockwise, -1 if clockwise and 0 if they are collinear
+def orientation(a: Tuple[int, int], b: Tuple[int, int], c: Tuple[int, int]):
+    cross = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (cross > 0) - (cross < 0)
+
+
+# c, collinear with a and b, is between them
+def _between(a: Tuple[int, int], b: Tuple[int, int], c: Tuple[int, int]):
+    return min(a[0], b[0]) <= c[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= c[1] <= max(a[1], b[1])
+
+
+# segments ab and cd share at least one point
+def segments_intersect(a: Tuple[int, int], b: Tuple[int, int], c: Tuple[int, int], d: Tuple[int, int]):
+    o1 = orientation(a, b, c)
+    o2 = orientation(a, b, d)
+    o3 = orientation(c, d, a)
+    o4 = orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return ((o1 == 0 and _between(a, b, c)) or (o2 == 0 and _between(a, b, d)) or
+            (o3 == 0 and _between(c, d, a)) or (o4 == 0 and _between(c, d, b)))
+
+
+# segment ab shares at least one point with the boundary of the integer corners
+def crosses_boundary(corners: Tuple[int, int, int, int], a: Tuple[int, int], b: Tuple[int, int]):
+    x0, y0, x1, y1 = corners
+    if contains((x0 + 1, y0 + 1, x1 - 1, y1 - 1), a) and contains((x0 + 1, y0 + 1, x1 - 1, y1 - 1), b):
+        return False
+    corner_points = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    return any(segments_intersect(a, b, corner_points[i], corner_points[(i + 1) % 4]) for i in range(4))
@@ -2,11 +2,41 @@ from typing import Iterable
 from math import sqrt
 
 
-# represents an 2-dimensional vector
+# hits and misses of the cached values derived from rectangles and lines, by name
+cache_counts = {'centre': [0, 0], 'boundaries': [0, 0], 'bounds': [0, 0], 'unit_direction': [0, 0]}
+_centre_counts = cache_counts['centre']
+_boundaries_counts = cache_counts['boundaries']
+_bounds_counts = cache_counts['bounds']
+_unit_direction_counts = cache_counts['unit_direction']
+
+
+# hits, misses and hit rate of each cached derived value
+def cache_stats():
+    return {name: {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else None}
+            for name, (hits, misses) in cache_counts.items()}
+
+
+def reset_cache_stats():
+    for counts in cache_counts.values():
+        counts[0] = counts[1] = 0
+
+
+# represents an 2-dimensional vector, never changed after construction so that it may be shared
 class Vector:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x: float, y: float):
-        self.x = x
-        self.y = y
+        _set_x(self, x)
+        _set_y(self, y)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError('vectors cannot be changed')
+
+    def __delattr__(self, name: str):
+        raise AttributeError('vectors cannot be changed')
+
+    def __reduce__(self):
+        return Vector, (self.x, self.y)
 
     def __add__(self, other: 'Vector'):
         return Vector(self.x + other.x, self.y + other.y)
@@ -33,8 +63,15 @@ class Vector:
         return sqrt(self.dot(self))
 
 
+# slot setters used to construct vectors, which refuse assignment
+_set_x = Vector.x.__set__
+_set_y = Vector.y.__set__
+
+
 # represents a matrix with two rows (i, j) and two columns
 class Matrix:
+    __slots__ = ('ix', 'iy', 'jx', 'jy')
+
     def __init__(self, ix: float, iy: float, jx: float, jy: float):
         self.ix = ix
         self.iy = iy
@@ -76,13 +113,37 @@ class Matrix:
         return Matrix(self.jy / d, -self.iy / d, -self.jx / d, self.ix / d)
 
 
-# represents an 2-dimensional rectangle
+# represents an 2-dimensional rectangle, never changed after construction as derived values are cached
 class Rectangle:
+    __slots__ = ('bottom_left', 'top_right', '_centre', '_boundaries')
+
     def __init__(self, from_point: Vector, to_point: Vector):
-        self.bottom_left = Vector(min(from_point.x, to_point.x), min(from_point.y, to_point.y))
-        self.top_right = Vector(max(from_point.x, to_point.x), max(from_point.y, to_point.y))
-        self.bottom_right = Vector(self.top_right.x, self.bottom_left.y)
-        self.top_left = Vector(self.bottom_left.x, self.top_right.y)
+        if from_point.x <= to_point.x and from_point.y <= to_point.y:
+            # already ordered corners are shared rather than copied
+            _set_bottom_left(self, from_point)
+            _set_top_right(self, to_point)
+        else:
+            _set_bottom_left(self, Vector(min(from_point.x, to_point.x), min(from_point.y, to_point.y)))
+            _set_top_right(self, Vector(max(from_point.x, to_point.x), max(from_point.y, to_point.y)))
+        _set_centre(self, None)
+        _set_boundaries(self, None)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError('rectangles cannot be changed')
+
+    def __delattr__(self, name: str):
+        raise AttributeError('rectangles cannot be changed')
+
+    def __reduce__(self):
+        return Rectangle, (self.bottom_left, self.top_right)
+
+    @property
+    def bottom_right(self):
+        return Vector(self.top_right.x, self.bottom_left.y)
+
+    @property
+    def top_left(self):
+        return Vector(self.bottom_left.x, self.top_right.y)
 
     def __add__(self, other: Vector):
         return Rectangle(self.bottom_left + other, self.top_right + other)
@@ -100,36 +161,151 @@ class Rectangle:
         return (self.bottom_left.equals(other.bottom_left, tolerance) and
                 self.top_right.equals(other.top_right, tolerance))
 
-    # centre point of the rectangle
+    # centre point of the rectangle, computed on first use
     def centre(self):
-        return Vector((self.bottom_left.x + self.top_right.x) / 2.0,
-                      (self.bottom_left.y + self.top_right.y) / 2.0)
+        centre = self._centre
+        if centre is None:
+            _centre_counts[1] += 1
+            centre = Vector((self.bottom_left.x + self.top_right.x) / 2.0,
+                            (self.bottom_left.y + self.top_right.y) / 2.0)
+            _set_centre(self, centre)
+        else:
+            _centre_counts[0] += 1
+        return centre
+
+    # left, right, bottom and top boundary lines, computed on first use
+    def boundaries(self):
+        boundaries = self._boundaries
+        if boundaries is None:
+            _boundaries_counts[1] += 1
+            top_left = self.top_left
+            bottom_right = self.bottom_right
+            boundaries = (
+                Line(self.bottom_left, top_left),
+                Line(bottom_right, self.top_right),
+                Line(self.bottom_left, bottom_right),
+                Line(top_left, self.top_right))
+            _set_boundaries(self, boundaries)
+        else:
+            _boundaries_counts[0] += 1
+        return boundaries
 
     # point is on or within the boundary
     def contains(self, point: Vector, tolerance: float):
         return (self.bottom_left.x - tolerance <= point.x <= self.top_right.x + tolerance and
                 self.bottom_left.y - tolerance <= point.y <= self.top_right.y + tolerance)
 
-    # list of intersections with the rectangle boundary
+    # other rectangle is on or within the boundary at some point
+    def overlaps(self, other: 'Rectangle', tolerance: float):
+        return (self.bottom_left.x - tolerance <= other.top_right.x and
+                other.bottom_left.x <= self.top_right.x + tolerance and
+                self.bottom_left.y - tolerance <= other.top_right.y and
+                other.bottom_left.y <= self.top_right.y + tolerance)
+
+    # list of intersections with the rectangle boundary, whose sides of zero length are skipped as they have no
+    # direction, a rectangle that is a point being crossed if the line passes within the tolerance of it
     def intersections_with(self, line: 'Line', tolerance: float):
-        boundaries = [
-            Line(self.bottom_left, self.top_left),
-            Line(self.bottom_right, self.top_right),
-            Line(self.bottom_left, self.bottom_right),
-            Line(self.top_left, self.top_right)]
+        bl = self.bottom_left
+        tr = self.top_right
+        if bl.x == tr.x or bl.y == tr.y:
+            if bl.x == tr.x and bl.y == tr.y:
+                return [bl] if self.clip(line, tolerance) is not None else []
+            boundaries = self.boundaries()[:2] if bl.y != tr.y else self.boundaries()[2:]
+        else:
+            boundaries = self.boundaries()
         return [intersection
-                for intersection in [boundary.intersection_with(line, tolerance, True) for boundary in boundaries]
+                for intersection in [boundary.intersection_with(line, tolerance, True)
+                                     for boundary in boundaries]
                 if intersection is not None]
 
+    # parameters (t0, t1) from the line's start (0) to its end (1) where it enters and leaves the rectangle widened
+    # by the tolerance, or None if it misses, found by Liang-Barsky clipping against each side in turn
+    def clip(self, line: 'Line', tolerance: float):
+        sx = line.start_point.x
+        sy = line.start_point.y
+        dx = line.end_point.x - sx
+        dy = line.end_point.y - sy
+        t0 = 0.0
+        t1 = 1.0
+        for p, q in ((-dx, sx - (self.bottom_left.x - tolerance)), (dx, self.top_right.x + tolerance - sx),
+                     (-dy, sy - (self.bottom_left.y - tolerance)), (dy, self.top_right.y + tolerance - sy)):
+            if p == 0.0:
+                # parallel to the side, so missing if outside it
+                if q < 0.0:
+                    return None
+            else:
+                t = q / p
+                if p < 0.0:
+                    if t > t1:
+                        return None
+                    if t > t0:
+                        t0 = t
+                else:
+                    if t < t0:
+                        return None
+                    if t < t1:
+                        t1 = t
+        return t0, t1
+
+    # part of the line on or within the rectangle widened by the tolerance, or None if it misses
+    def clipped(self, line: 'Line', tolerance: float):
+        clip = self.clip(line, tolerance)
+        if clip is None:
+            return None
+        direction = line.end_point - line.start_point
+        return Line(line.start_point + direction * clip[0], line.start_point + direction * clip[1])
 
-# represents a line between two 2-dimensional points
+
+# slot setters used to construct rectangles and cache their derived values, as they refuse assignment
+_set_bottom_left = Rectangle.bottom_left.__set__
+_set_top_right = Rectangle.top_right.__set__
+_set_centre = Rectangle._centre.__set__
+_set_boundaries = Rectangle._boundaries.__set__
+
+
+# represents a line between two 2-dimensional points, never changed after construction as derived values are cached
 class Line:
+    __slots__ = ('start_point', 'end_point', '_bounds', '_unit_direction')
+
     def __init__(self, start_point: Vector, end_point: Vector):
-        self.start_point = start_point
-        self.end_point = end_point
-        self.bounds = Rectangle(start_point, end_point)
-        direction = end_point - start_point
-        self.unit_direction = direction / direction.magnitude()
+        _set_start_point(self, start_point)
+        _set_end_point(self, end_point)
+        _set_bounds(self, None)
+        _set_unit_direction(self, None)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError('lines cannot be changed')
+
+    def __delattr__(self, name: str):
+        raise AttributeError('lines cannot be changed')
+
+    def __reduce__(self):
+        return Line, (self.start_point, self.end_point)
+
+    # rectangle spanning the end-points, computed on first use
+    @property
+    def bounds(self):
+        bounds = self._bounds
+        if bounds is None:
+            _bounds_counts[1] += 1
+            bounds = Rectangle(self.start_point, self.end_point)
+            _set_bounds(self, bounds)
+        else:
+            _bounds_counts[0] += 1
+        return bounds
+
+    # normalised direction from start to end, computed on first use
+    @property
+    def unit_direction(self):
+        unit_direction = self._unit_direction
+        if unit_direction is None:
+            _unit_direction_counts[1] += 1
+            direction = self.end_point - self.start_point
+            unit_direction = direction / direction.magnitude()
+            _set_unit_direction(self, unit_direction)
+        else:
+            _unit_direction_counts[0] += 1
+        return unit_direction
 
     def __add__(self, other: Vector):
         return Line(self.start_point + other, self.end_point + other)
@@ -151,14 +327,23 @@ class Line:
         return 1.0 - abs(self.unit_direction.dot(other.unit_direction)) < tolerance
 
     def intersection_with(self, other: 'Line', tolerance: float, bounded: bool):
-        if self.is_parallel_to(other, tolerance):
+        u = self.unit_direction
+        v = other.unit_direction
+        if 1.0 - abs(u.dot(v)) < tolerance:
             return None
-        d = Matrix(self.unit_direction.x, other.unit_direction.x, self.unit_direction.y, other.unit_direction.y)
+        d = Matrix(u.x, v.x, u.y, v.y)
         lamb = d.inverse().multiply_i(other.start_point - self.start_point)
-        intersection = self.start_point + self.unit_direction * lamb
+        intersection = self.start_point + u * lamb
         return (
             intersection
             if not bounded or (
                             self.bounds.contains(intersection, tolerance) and
                             other.bounds.contains(intersection, tolerance))
             else None)
+
+
+# slot setters used to construct lines and cache their derived values, as they refuse assignment
+_set_start_point = Line.start_point.__set__
+_set_end_point = Line.end_point.__set__
+_set_bounds = Line._bounds.__set__
+_set_unit_direction = Line._unit_direction.__set__
@@ -0,0 +1,65 @@
+from math import floor
+from spacial.geometry import Vector
+from spacial.versioned import VersionedDict
+
+
+# represents a uniform grid of keyed points hashed by cell, whose copies share cells until they change them
+class Grid:
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells = {}
+        # cells this grid may change in place, or None while it shares none with a copy
+        self._own = None
+
+    # copy sharing all cells with this grid, each copying a cell only when it first changes one that it shares
+    def copy(self):
+        if not isinstance(self.cells, VersionedDict):
+            self.cells = VersionedDict(self.cells.items())
+        other = Grid(self.cell_size)
+        other.cells = self.cells.copy()
+        other._own = set()
+        self._own = set()
+        return other
+
+    # members of the cell as they may be changed in place, copied first if shared
+    def _writable(self, cell: tuple, members: dict):
+        if self._own is None or cell in self._own:
+            return members
+        members = self.cells[cell] = dict(members)
+        self._own.add(cell)
+        return members
+
+    # cell coordinates containing the point
+    def cell_of(self, point: Vector):
+        return floor(point.x / self.cell_size), floor(point.y / self.cell_size)
+
+    # add keyed point to its cell
+    def insert(self, key, point: Vector):
+        cell = self.cell_of(point)
+        members = self.cells.get(cell)
+        if members is None:
+            members = self.cells[cell] = {}
+            if self._own is not None:
+                self._own.add(cell)
+        else:
+            members = self._writable(cell, members)
+        members[key] = point
+
+    # remove keyed point from its cell
+    def remove(self, key, point: Vector):
+        cell = self.cell_of(point)
+        members = self._writable(cell, self.cells[cell])
+        del members[key]
+        if not members:
+            del self.cells[cell]
+            if self._own is not None:
+                self._own.discard(cell)
+
+    # (key, point) pairs in the cell containing the point and its eight neighbours
+    def near(self, point: Vector):
+        cx, cy = self.cell_of(point)
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                members = self.cells.get((i, j))
+                if members is not None:
+                    yield from members.items()
@@ -0,0 +1,163 @@
+# opt-in counts, timings and allocations of hot paths, which replace the methods only while enabled so that they
+# cost nothing otherwise
+from typing import Iterable
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import logging
+import sys
+import time
+from spacial.geometry import Line, Rectangle
+from spacial.world import World
+
+
+# (class, method) pairs instrumented when enabled
+hot_paths = [
+    (World, 'find_near_to'),
+    (World, 'find'),
+    (World, 'remove'),
+    (Rectangle, 'intersections_with'),
+    (Line, 'intersection_with'),
+]
+
+# upper bounds in seconds of the latency histogram buckets, with a last bucket for anything slower
+latency_buckets = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+# original methods of the hot paths while instrumented
+_originals = {}
+
+
+# represents the counts of calls to one method
+class Metric:
+    __slots__ = ('calls', 'seconds', 'allocated', 'buckets')
+
+    def __init__(self, bucket_count: int):
+        self.calls = 0
+        self.seconds = 0.0
+        self.allocated = None
+        self.buckets = [0] * bucket_count
+
+
+# represents a sink keeping the counts of each method in memory
+class MemorySink:
+    def __init__(self, buckets: Iterable[float] = latency_buckets):
+        self.buckets = tuple(buckets)
+        self.metrics = {}
+
+    # count a call taking the seconds, with the net number of memory blocks it allocated or None if not tracked
+    def record(self, name: str, seconds: float, allocated: int):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = Metric(len(self.buckets) + 1)
+        metric.calls += 1
+        metric.seconds += seconds
+        if allocated is not None:
+            metric.allocated = (metric.allocated or 0) + allocated
+        metric.buckets[bisect_left(self.buckets, seconds)] += 1
+
+    def reset(self):
+        self.metrics = {}
+
+
+# represents a sink that logs calls slower than a threshold as they happen and a summary of the counts on request
+class LoggingSink(MemorySink):
+    def __init__(self, logger: logging.Logger = None, slow: float = None, level: int = logging.INFO,
+                 buckets: Iterable[float] = latency_buckets):
+        super().__init__(buckets)
+        self.logger = logger if logger is not None else logging.getLogger('spacial')
+        self.slow = slow
+        self.level = level
+
+    def record(self, name: str, seconds: float, allocated: int):
+        super().record(name, seconds, allocated)
+        if self.slow is not None and seconds > self.slow:
+            self.logger.warning('slow %s: %.6f s', name, seconds)
+
+    # log a line of counts for each method
+    def log(self):
+        for name, metric in sorted(self.metrics.items()):
+            self.logger.log(self.level, '%s: %d calls, %.6f s, %.3f us/call%s', name, metric.calls, metric.seconds,
+                            metric.seconds / metric.calls * 1e6,
+                            '' if metric.allocated is None else ', %d blocks allocated' % metric.allocated)
+
+
+# represents a sink whose counts are exported in the Prometheus text format
+class PrometheusSink(MemorySink):
+    def text(self, prefix: str = 'spacial'):
+        lines = ['# HELP %s_call_seconds time spent in instrumented calls' % prefix,
+                 '# TYPE %s_call_seconds histogram' % prefix]
+        for name, metric in sorted(self.metrics.items()):
+            cumulative = 0
+            for bound, count in zip([repr(b) for b in self.buckets] + ['+Inf'], metric.buckets):
+                cumulative += count
+                lines.append('%s_call_seconds_bucket{method="%s",le="%s"} %d' % (prefix, name, bound, cumulative))
+            lines.append('%s_call_seconds_sum{method="%s"} %r' % (prefix, name, metric.seconds))
+            lines.append('%s_call_seconds_count{method="%s"} %d' % (prefix, name, metric.calls))
+        allocating = [(name, metric) for name, metric in sorted(self.metrics.items()) if metric.allocated is not None]
+        if allocating:
+            lines.append('# HELP %s_allocated_blocks_total net memory blocks allocated by instrumented calls' % prefix)
+            lines.append('# TYPE %s_allocated_blocks_total counter' % prefix)
+            for name, metric in allocating:
+                lines.append('%s_allocated_blocks_total{method="%s"} %d' % (prefix, name, metric.allocated))
+        return '\n'.join(lines) + '\n'
+
+
+# method recording each call to the sink
+def _instrumented(method, name: str, sink: MemorySink, allocations: bool):
+    record = sink.record
+    clock = time.perf_counter
+    if allocations:
+        blocks = sys.getallocatedblocks
+
+        @wraps(method)
+        def counted(*args, **kwargs):
+            before = blocks()
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                seconds = clock() - start
+                record(name, seconds, blocks() - before)
+    else:
+        @wraps(method)
+        def counted(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(name, clock() - start, None)
+    return counted
+
+
+def enabled():
+    return bool(_originals)
+
+
+# instrument the hot paths, recording to the sink or a new in-memory sink, and counting the net memory blocks
+# allocated by each call if allocations
+def enable(sink: MemorySink = None, allocations: bool = False):
+    disable()
+    if sink is None:
+        sink = MemorySink()
+    for cls, method_name in hot_paths:
+        method = cls.__dict__[method_name]
+        _originals[(cls, method_name)] = method
+        setattr(cls, method_name, _instrumented(method, cls.__name__ + '.' + method_name, sink, allocations))
+    return sink
+
+
+# restore the hot paths to their uninstrumented methods
+def disable():
+    for (cls, method_name), method in _originals.items():
+        setattr(cls, method_name, method)
+    _originals.clear()
+
+
+# sink recording the hot paths while in the context
+@contextmanager
+def instrumented(sink: MemorySink = None, allocations: bool = False):
+    sink = enable(sink, allocations)
+    try:
+        yield sink
+    finally:
+        disable()
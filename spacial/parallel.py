@@ -0,0 +1,147 @@
+from typing import Iterable
+import atexit
+import weakref
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from spacial import snapshot
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+
+
+# world methods that may be queried, all returning an entity, None or a list of entities
+query_methods = {'find', 'find_near_to', 'query_rect', 'query_point', 'nearest', 'within_radius'}
+
+# shared memory and world of a worker process
+_memory = None
+_world = None
+
+
+# attach a worker process to the snapshot image in shared memory
+def _attach(memory_name: str):
+    global _memory, _world
+    _memory = SharedMemory(memory_name)
+    _world = snapshot.from_image(_memory.buf)
+    atexit.register(_detach)
+
+
+# release the world's views of the shared memory so that it can be closed
+def _detach():
+    global _world
+    _world = None
+    _memory.close()
+
+
+# query result with entities replaced by their names
+def _names(result):
+    if isinstance(result, Entity):
+        return result.name
+    if isinstance(result, list):
+        return [entity.name for entity in result]
+    return result
+
+
+# list of queries, checking each names a query method
+def _checked(queries: Iterable[tuple]):
+    queries = list(queries)
+    for query in queries:
+        if query[0] not in query_methods:
+            raise ValueError('cannot query ' + repr(query[0]))
+    return queries
+
+
+def _run(queries: list):
+    return [_names(getattr(_world, query[0])(*query[1:])) for query in queries]
+
+
+# names of the worker's entities matching each (x0, y0, x1, y1) row of bounds, in insertion order
+def _probe(chunk: tuple):
+    predicate, tolerance, rows = chunk
+    return [[entity.name for entity in _world._in_order(
+                _world._matches(Rectangle(Vector(x0, y0), Vector(x1, y1)), predicate, tolerance))]
+            for x0, y0, x1, y1 in rows]
+
+
+# stop the workers and free the shared memory they were attached to
+def _release(pool, memory: SharedMemory):
+    pool.close()
+    pool.join()
+    memory.close()
+    memory.unlink()
+
+
+# represents a pool of worker processes answering queries against a world shared through memory, released when
+# closed or else when collected or at exit
+class QueryPool:
+    def __init__(self, world: World, workers: int):
+        self.world = world
+        image = snapshot.image_of(world)
+        self._memory = SharedMemory(create=True, size=len(image))
+        self._memory.buf[:len(image)] = image
+        self._pool = Pool(workers, initializer=_attach, initargs=(self._memory.name,))
+        self.workers = workers
+        self._release = weakref.finalize(self, _release, self._pool, self._memory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # results of (method, *args) queries in input order, split into chunks across the workers
+    def query(self, queries: Iterable[tuple], chunk_size: int = None):
+        queries = _checked(queries)
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(queries) // (4 * self.workers)))
+        chunks = [queries[i:i + chunk_size] for i in range(0, len(queries), chunk_size)]
+        entities = self.world.entities
+        results = []
+        for chunk in self._pool.map(_run, chunks):
+            for result in chunk:
+                if isinstance(result, str):
+                    results.append(entities[result])
+                elif isinstance(result, list):
+                    results.append([entities[name] for name in result])
+                else:
+                    results.append(result)
+        return results
+
+    # pairs (a, b) of the entities and the world's entities matching them, as World.join, generated a chunk at a time
+    # as the workers finish them
+    def join(self, entities: Iterable[Entity], predicate: str, tolerance: float, chunk_size: int = None):
+        entities = list(entities)
+        rows = [(e.bounds.bottom_left.x, e.bounds.bottom_left.y, e.bounds.top_right.x, e.bounds.top_right.y)
+                for e in entities]
+        if chunk_size is None:
+            chunk_size = max(1, -(-len(rows) // (4 * self.workers)))
+        starts = range(0, len(rows), chunk_size)
+        found = self.world.entities
+        for start, chunk in zip(starts, self._pool.imap(_probe, [(predicate, tolerance, rows[i:i + chunk_size])
+                                                                 for i in starts])):
+            for a, names in zip(entities[start:start + chunk_size], chunk):
+                for name in names:
+                    yield a, found[name]
+
+    def close(self):
+        self._release()
+
+
+# pool of the workers kept by the world, started on first use and again if the number of workers differs; the world
+# closes it when it changes so that the workers never answer from an image of an older state
+def pool_of(world: World, workers: int):
+    pool = world._pool
+    if pool is None or pool.workers != workers:
+        world.close()
+        pool = world._pool = QueryPool(world, workers)
+    return pool
+
+
+# results of (method, *args) queries against the world in input order, using a pool of workers if more than one
+def batch_query(world: World, queries: Iterable[tuple], workers: int = 1):
+    if workers <= 1:
+        return [getattr(world, query[0])(*query[1:]) for query in _checked(queries)]
+    return pool_of(world, workers).query(queries)
+
+
+# pairs of entities of the world and the other matching them, as World.join, probing the other from a pool of workers
+def join(world: World, other: World, predicate: str, tolerance: float, workers: int):
+    yield from pool_of(other, workers).join(world.entities.values(), predicate, tolerance)
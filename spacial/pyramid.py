@@ -0,0 +1,185 @@
+from typing import Iterable, Tuple
+from spacial.geometry import Rectangle, Vector
+
+
+# represents the number, union of bounds and sum of centres of the entries whose centres fall in a cell, held as
+# plain numbers as there is one for every non-empty cell of every level
+class Aggregate:
+    __slots__ = ('zoom', 'cell', 'count', 'x', 'y', 'x0', 'y0', 'x1', 'y1')
+
+    def __init__(self, zoom: int, cell: Tuple[int, int], count: int, x: float, y: float,
+                 x0: float, y0: float, x1: float, y1: float):
+        self.zoom = zoom
+        self.cell = cell
+        self.count = count
+        self.x = x
+        self.y = y
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+
+    # union of the bounds of the entries
+    @property
+    def bounds(self):
+        return Rectangle(Vector(self.x0, self.y0), Vector(self.x1, self.y1))
+
+    # sum of the centres of the entries
+    @property
+    def total(self):
+        return Vector(self.x, self.y)
+
+    # mean centre of the entries
+    def centroid(self):
+        return Vector(self.x / self.count, self.y / self.count)
+
+    # add the count, sums of centres and bounds of further entries
+    def add(self, count: int, x: float, y: float, x0: float, y0: float, x1: float, y1: float):
+        self.count += count
+        self.x += x
+        self.y += y
+        if x0 < self.x0:
+            self.x0 = x0
+        if y0 < self.y0:
+            self.y0 = y0
+        if x1 > self.x1:
+            self.x1 = x1
+        if y1 > self.y1:
+            self.y1 = y1
+
+
+# represents a quadtree of aggregates over a square covering an extent, where zoom level z splits the square into
+# 2**z by 2**z cells; entries whose centres fall outside the square are counted in the nearest edge cells, so an
+# owner inserting such entries should rebuild it over the larger extent instead
+class Pyramid:
+    def __init__(self, extent: Rectangle, levels: int, entries: Iterable[Tuple[object, Rectangle]]):
+        self.origin = extent.bottom_left
+        self.side = max(extent.top_right.x - extent.bottom_left.x, extent.top_right.y - extent.bottom_left.y) or 1.0
+        self.levels = levels
+        # aggregates of the non-empty cells at each zoom level
+        self.cells = [{} for _ in range(levels)]
+        self._members = {}
+        self._cell_of = {}
+        finest = self.cells[levels - 1]
+        for key, bounds in entries:
+            cell = self._add_member(key, bounds)
+            centre = bounds.centre()
+            bl = bounds.bottom_left
+            tr = bounds.top_right
+            a = finest.get(cell)
+            if a is None:
+                finest[cell] = Aggregate(levels - 1, cell, 1, centre.x, centre.y, bl.x, bl.y, tr.x, tr.y)
+            else:
+                a.add(1, centre.x, centre.y, bl.x, bl.y, tr.x, tr.y)
+        for zoom in range(levels - 2, -1, -1):
+            cells = self.cells[zoom]
+            for a in self.cells[zoom + 1].values():
+                cell = (a.cell[0] >> 1, a.cell[1] >> 1)
+                above = cells.get(cell)
+                if above is None:
+                    cells[cell] = Aggregate(zoom, cell, a.count, a.x, a.y, a.x0, a.y0, a.x1, a.y1)
+                else:
+                    above.add(a.count, a.x, a.y, a.x0, a.y0, a.x1, a.y1)
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    # point is on or within the square
+    def covers(self, point: Vector):
+        return (self.origin.x <= point.x <= self.origin.x + self.side and
+                self.origin.y <= point.y <= self.origin.y + self.side)
+
+    # finest cell containing the point, clamped to the square
+    def _cell(self, point: Vector):
+        n = 2 ** (self.levels - 1)
+        size = self.side / n
+        return (min(max(int((point.x - self.origin.x) // size), 0), n - 1),
+                min(max(int((point.y - self.origin.y) // size), 0), n - 1))
+
+    def _add_member(self, key, bounds: Rectangle):
+        cell = self._cell(bounds.centre())
+        self._members.setdefault(cell, {})[key] = bounds
+        self._cell_of[key] = cell
+        return cell
+
+    # recompute the aggregate of the cell from its entries or from the cells it splits into
+    def _refit(self, zoom: int, cell: Tuple[int, int]):
+        aggregate = None
+        if zoom == self.levels - 1:
+            for bounds in self._members.get(cell, {}).values():
+                centre = bounds.centre()
+                bl = bounds.bottom_left
+                tr = bounds.top_right
+                if aggregate is None:
+                    aggregate = Aggregate(zoom, cell, 1, centre.x, centre.y, bl.x, bl.y, tr.x, tr.y)
+                else:
+                    aggregate.add(1, centre.x, centre.y, bl.x, bl.y, tr.x, tr.y)
+        else:
+            i, j = cell
+            below = self.cells[zoom + 1]
+            for part in (below.get((2 * i, 2 * j)), below.get((2 * i + 1, 2 * j)),
+                         below.get((2 * i, 2 * j + 1)), below.get((2 * i + 1, 2 * j + 1))):
+                if part is None:
+                    continue
+                if aggregate is None:
+                    aggregate = Aggregate(zoom, cell, part.count, part.x, part.y, part.x0, part.y0, part.x1, part.y1)
+                else:
+                    aggregate.add(part.count, part.x, part.y, part.x0, part.y0, part.x1, part.y1)
+        if aggregate is not None:
+            self.cells[zoom][cell] = aggregate
+        else:
+            self.cells[zoom].pop(cell, None)
+
+    # recompute the aggregates of the finest cell and the cells containing it at every coarser level
+    def _refit_up(self, cell: Tuple[int, int]):
+        i, j = cell
+        for zoom in range(self.levels - 1, -1, -1):
+            self._refit(zoom, (i, j))
+            i >>= 1
+            j >>= 1
+
+    # add or replace the keyed entry
+    def insert(self, key, bounds: Rectangle):
+        if key in self._cell_of:
+            self.remove(key)
+        self._refit_up(self._add_member(key, bounds))
+
+    def remove(self, key):
+        cell = self._cell_of.pop(key)
+        members = self._members[cell]
+        del members[key]
+        if not members:
+            del self._members[cell]
+        self._refit_up(cell)
+
+    # region of the cell at the zoom level
+    def region(self, zoom: int, cell: Tuple[int, int]):
+        size = self.side / 2 ** zoom
+        bottom_left = Vector(self.origin.x + cell[0] * size, self.origin.y + cell[1] * size)
+        return Rectangle(bottom_left, bottom_left + Vector(size, size))
+
+    # aggregates of the non-empty cells at the zoom level whose regions overlap the rectangle, in cell order,
+    # descending only into non-empty cells so that the time taken follows the number found
+    def query(self, rect: Rectangle, zoom: int):
+        if not 0 <= zoom < self.levels:
+            raise ValueError('zoom must be from 0 to %d' % (self.levels - 1))
+        found = []
+        stack = [(0, (0, 0))] if self.cells[0] else []
+        while stack:
+            z, cell = stack.pop()
+            size = self.side / 2 ** z
+            x0 = self.origin.x + cell[0] * size
+            y0 = self.origin.y + cell[1] * size
+            if not (x0 <= rect.top_right.x and rect.bottom_left.x <= x0 + size and
+                    y0 <= rect.top_right.y and rect.bottom_left.y <= y0 + size):
+                continue
+            if z == zoom:
+                found.append(self.cells[z][cell])
+                continue
+            i, j = cell
+            below = self.cells[z + 1]
+            stack.extend((z + 1, child) for child in ((2 * i, 2 * j), (2 * i + 1, 2 * j),
+                                                      (2 * i, 2 * j + 1), (2 * i + 1, 2 * j + 1))
+                         if child in below)
+        found.sort(key=lambda aggregate: aggregate.cell)
+        return found
@@ -0,0 +1,312 @@
+from typing import Callable, Iterable, List
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil, inf, sqrt
+from spacial.geometry import Rectangle, Vector
+from spacial.versioned import VersionedDict
+
+
+# smallest rectangle covering all the rectangles or None if there are none
+def bounding(rectangles: Iterable[Rectangle]):
+    rectangles = list(rectangles)
+    if not rectangles:
+        return None
+    return Rectangle(Vector(min(r.bottom_left.x for r in rectangles), min(r.bottom_left.y for r in rectangles)),
+                     Vector(max(r.top_right.x for r in rectangles), max(r.top_right.y for r in rectangles)))
+
+
+def _area(r: Rectangle):
+    return (r.top_right.x - r.bottom_left.x) * (r.top_right.y - r.bottom_left.y)
+
+
+# growth in area of a rectangle needed to cover another
+def _enlargement(r: Rectangle, other: Rectangle):
+    return (max(r.top_right.x, other.top_right.x) - min(r.bottom_left.x, other.bottom_left.x)) * (
+            max(r.top_right.y, other.top_right.y) - min(r.bottom_left.y, other.bottom_left.y)) - _area(r)
+
+
+# least distance from the point to any point on or within the rectangle
+def _distance(r: Rectangle, point: Vector):
+    return Vector(max(r.bottom_left.x - point.x, 0.0, point.x - r.top_right.x),
+                  max(r.bottom_left.y - point.y, 0.0, point.y - r.top_right.y)).magnitude()
+
+
+# range (lo, hi) of t for which start + direction * t is on or within the rectangle widened by the margin,
+# or None if there is none
+def span(r: Rectangle, start: Vector, direction: Vector, margin: float):
+    lo = -inf
+    hi = inf
+    for s, d, low, high in ((start.x, direction.x, r.bottom_left.x - margin, r.top_right.x + margin),
+                            (start.y, direction.y, r.bottom_left.y - margin, r.top_right.y + margin)):
+        if d == 0.0:
+            if not low <= s <= high:
+                return None
+        else:
+            t0 = (low - s) / d
+            t1 = (high - s) / d
+            if t0 > t1:
+                t0, t1 = t1, t0
+            lo = max(lo, t0)
+            hi = min(hi, t1)
+    return (lo, hi) if lo <= hi else None
+
+
+# sort-tile-recursive grouping of items into runs of at most capacity, ordered by x_of then y_of, each giving the
+# sum of an item's lower and upper coordinate so as to order items by their centres
+def _tiles(items: list, capacity: int, x_of: Callable, y_of: Callable):
+    if not items:
+        return
+    count = ceil(len(items) / capacity)
+    slab = capacity * ceil(sqrt(count))
+    items = sorted(items, key=x_of)
+    for s in range(0, len(items), slab):
+        column = sorted(items[s:s + slab], key=y_of)
+        for t in range(0, len(column), capacity):
+            yield column[t:t + capacity]
+
+
+def _centre_x(node):
+    return node.bounds.bottom_left.x + node.bounds.top_right.x
+
+
+def _centre_y(node):
+    return node.bounds.bottom_left.y + node.bounds.top_right.y
+
+
+# represents an R-tree node holding keyed rectangles (leaf) or child nodes
+class Node:
+    def __init__(self, leaf: bool):
+        self.leaf = leaf
+        self.children = {} if leaf else []
+        self.bounds = None
+
+    # rectangles of the entries or child nodes
+    def child_bounds(self):
+        return list(self.children.values()) if self.leaf else [child.bounds for child in self.children]
+
+    # set bounds to exactly cover the children
+    def refit(self):
+        self.bounds = bounding(self.child_bounds())
+
+
+# represents an R-tree of keyed rectangles, bulk loaded by sort-tile-recursive packing, whose copies share nodes
+# until they change them
+class RTree:
+    def __init__(self, entries: Iterable[tuple], capacity: int = 16):
+        self.capacity = capacity
+        # leaf holding each key and parent of each node below the root, kept by the tree rather than the nodes so
+        # that copies may share nodes
+        self._leaves = {}
+        self._parents = {}
+        # nodes this tree may change in place, or None while it shares none with a copy
+        self._own = None
+        level = []
+        for run in _tiles(list(entries), capacity, lambda entry: entry[1].bottom_left.x + entry[1].top_right.x,
+                          lambda entry: entry[1].bottom_left.y + entry[1].top_right.y):
+            leaf = Node(True)
+            for key, bounds in run:
+                leaf.children[key] = bounds
+                self._leaves[key] = leaf
+            leaf.refit()
+            level.append(leaf)
+        self._pack(level)
+
+    # tree of the keys whose bounds are the (x0, y0, x1, y1) rows of a column of floats in the same order, packed
+    # from the column so that the only objects created for each key are the rectangle of its leaf entry
+    @staticmethod
+    def packed(keys: List, bounds, capacity: int = 16):
+        tree = RTree([], capacity)
+        level = []
+        for run in _tiles(range(len(keys)), capacity, lambda i: bounds[4 * i] + bounds[4 * i + 2],
+                          lambda i: bounds[4 * i + 1] + bounds[4 * i + 3]):
+            leaf = Node(True)
+            x0 = y0 = inf
+            x1 = y1 = -inf
+            for i in run:
+                bx0, by0, bx1, by1 = bounds[4 * i:4 * i + 4]
+                leaf.children[keys[i]] = Rectangle(Vector(bx0, by0), Vector(bx1, by1))
+                tree._leaves[keys[i]] = leaf
+                x0 = min(x0, bx0)
+                y0 = min(y0, by0)
+                x1 = max(x1, bx1)
+                y1 = max(y1, by1)
+            leaf.bounds = Rectangle(Vector(x0, y0), Vector(x1, y1))
+            level.append(leaf)
+        tree._pack(level)
+        return tree
+
+    # set the root to that of the branches packed over the nodes of a level
+    def _pack(self, level: List[Node]):
+        while len(level) > 1:
+            level = [self._branch(run) for run in _tiles(level, self.capacity, _centre_x, _centre_y)]
+        self.root = level[0] if level else Node(True)
+
+    def __len__(self):
+        return len(self._leaves)
+
+    def __contains__(self, key):
+        return key in self._leaves
+
+    # copy sharing all nodes with this tree, each copying a node and those above it only when it first changes one
+    # that it shares
+    def copy(self):
+        if not isinstance(self._leaves, VersionedDict):
+            self._leaves = VersionedDict(self._leaves.items())
+            self._parents = VersionedDict(self._parents.items())
+        other = RTree.__new__(RTree)
+        other.capacity = self.capacity
+        other.root = self.root
+        other._leaves = self._leaves.copy()
+        other._parents = self._parents.copy()
+        other._own = set()
+        self._own = set()
+        return other
+
+    # new node owned by this tree
+    def _node(self, leaf: bool):
+        node = Node(leaf)
+        if self._own is not None:
+            self._own.add(node)
+        return node
+
+    # node as it may be changed in place, replaced first by a copy along with the nodes above it if shared
+    def _writable(self, node: Node):
+        if self._own is None or node in self._own:
+            return node
+        parent = self._parents.get(node)
+        writable = self._node(node.leaf)
+        writable.bounds = node.bounds
+        if node.leaf:
+            writable.children = dict(node.children)
+            for key in writable.children:
+                self._leaves[key] = writable
+        else:
+            writable.children = list(node.children)
+            for child in writable.children:
+                self._parents[child] = writable
+        if parent is None:
+            self.root = writable
+        else:
+            parent = self._writable(parent)
+            parent.children[parent.children.index(node)] = writable
+            del self._parents[node]
+            self._parents[writable] = parent
+        return writable
+
+    def _branch(self, children: List[Node]):
+        node = self._node(False)
+        node.children = children
+        for child in children:
+            self._parents[child] = node
+        node.refit()
+        return node
+
+    # refit bounds from node up to the root
+    def _refit_up(self, node: Node):
+        while node is not None:
+            node.refit()
+            node = self._parents.get(node)
+
+    # halve an overflowing node along the longer side of its bounds
+    def _split(self, node: Node):
+        bounds = node.bounds
+        wide = bounds.top_right.x - bounds.bottom_left.x >= bounds.top_right.y - bounds.bottom_left.y
+        if node.leaf:
+            items = sorted(node.children.items(),
+                           key=lambda item: item[1].bottom_left.x + item[1].top_right.x if wide
+                           else item[1].bottom_left.y + item[1].top_right.y)
+        else:
+            items = sorted(node.children,
+                           key=lambda child: child.bounds.bottom_left.x + child.bounds.top_right.x if wide
+                           else child.bounds.bottom_left.y + child.bounds.top_right.y)
+        half = len(items) // 2
+        sibling = self._node(node.leaf)
+        if node.leaf:
+            node.children = dict(items[:half])
+            sibling.children = dict(items[half:])
+            for key in sibling.children:
+                self._leaves[key] = sibling
+        else:
+            node.children = items[:half]
+            sibling.children = items[half:]
+            for child in sibling.children:
+                self._parents[child] = sibling
+        node.refit()
+        sibling.refit()
+        parent = self._parents.get(node)
+        if parent is None:
+            self.root = self._branch([node, sibling])
+        else:
+            self._parents[sibling] = parent
+            parent.children.append(sibling)
+
+    # add keyed rectangle to the leaf needing least enlargement
+    def insert(self, key, bounds: Rectangle):
+        node = self.root
+        while not node.leaf:
+            node = min(node.children, key=lambda child: (_enlargement(child.bounds, bounds), _area(child.bounds)))
+        node = self._writable(node)
+        node.children[key] = bounds
+        self._leaves[key] = node
+        while node is not None:
+            parent = self._parents.get(node)
+            if len(node.children) > self.capacity:
+                self._split(node)
+            else:
+                node.refit()
+            node = parent
+
+    # remove keyed rectangle, dropping emptied nodes
+    def remove(self, key):
+        node = self._writable(self._leaves[key])
+        del self._leaves[key]
+        del node.children[key]
+        while not node.children and node is not self.root:
+            parent = self._parents.pop(node)
+            parent.children.remove(node)
+            node = parent
+        if not node.children:
+            self.root = self._node(True)
+        else:
+            self._refit_up(node)
+
+    # keys of rectangles for which the test holds, pruning nodes whose bounds fail it
+    def search(self, test: Callable[[Rectangle], bool]):
+        found = []
+        stack = [self.root] if self.root.bounds is not None and test(self.root.bounds) else []
+        while stack:
+            node = stack.pop()
+            if node.leaf:
+                found.extend(key for key, bounds in node.children.items() if test(bounds))
+            else:
+                stack.extend(child for child in node.children if test(child.bounds))
+        return found
+
+    # (distance, key) pairs in order of distance, where bound gives no more than the distance of any entry within
+    # a rectangle and either may give None to skip it, visiting nodes best-first so that only those nearer than
+    # the last pair taken are expanded
+    def best_first(self, bound: Callable[[Rectangle], float], distance: Callable[[object, Rectangle], float]):
+        sequence = count()
+        heap = []
+        d = None if self.root.bounds is None else bound(self.root.bounds)
+        if d is not None:
+            heap.append((d, next(sequence), self.root, None))
+        while heap:
+            d, _, node, key = heappop(heap)
+            if node is None:
+                yield d, key
+            elif node.leaf:
+                for key, bounds in node.children.items():
+                    d = distance(key, bounds)
+                    if d is not None:
+                        heappush(heap, (d, next(sequence), None, key))
+            else:
+                for child in node.children:
+                    d = bound(child.bounds)
+                    if d is not None:
+                        heappush(heap, (d, next(sequence), child, None))
+
+    # (distance, key) pairs in order of distance from the point, where the distance to each entry is no less than
+    # that to its rectangle
+    def nearest(self, point: Vector, distance: Callable[[object, Rectangle], float]):
+        return self.best_first(lambda r: _distance(r, point), distance)
@@ -0,0 +1,210 @@
+# line protocol server for a world, run with python -m spacial.server snapshot [--socket path]
+#
+# each request and response is one JSON object per line:
+#   {"id": 1, "op": "find", "name": "I"}
+#   {"id": 2, "op": "find_near_to", "name": "I", "tolerance": 1e-7}
+#   {"id": 3, "op": "find_near_to", "bounds": [0, 0, 1, 1], "tolerance": 1e-7, "layers": [1, 2]}
+#   {"id": 4, "op": "remove", "name": "I"}
+#   {"id": 5, "op": "stats"}
+# answered by {"id": ..., "result": ...} or {"id": ..., "error": "..."}, entities given as
+#   {"name": "I", "bounds": [x0, y0, x1, y1], "layer": 1}
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+
+
+def entity_json(entity: Entity):
+    if entity is None:
+        return None
+    bl = entity.bounds.bottom_left
+    tr = entity.bounds.top_right
+    return {'name': entity.name, 'bounds': [bl.x, bl.y, tr.x, tr.y], 'layer': entity.layer}
+
+
+# value at the fraction of the way through sorted values
+def percentile(values: list, fraction: float):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+# represents a server applying concurrent requests against a world in arrival order, taking every request waiting
+# when it is ready as one batch applied without yielding, so that no request waits for a batch to fill
+class WorldServer:
+    def __init__(self, world: World, max_batch: int = 256, latency_samples: int = 10000):
+        self.world = world
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self._latencies = deque(maxlen=latency_samples)
+        self._queue = None
+        self._task = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    # response to the request once its batch has been applied, or an error at once if it is not a JSON object
+    async def submit(self, request: dict):
+        if not isinstance(request, dict):
+            return {'id': None, 'error': 'ValueError: request must be a JSON object'}
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time.perf_counter(), request, future))
+        return await future
+
+    # take the next batch: the first request to arrive and any others already waiting, up to the batch size
+    async def _batch(self):
+        batch = [await self._queue.get()]
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._batch()
+            self.batches += 1
+            for received, request, future in batch:
+                try:
+                    response = self.apply(request)
+                except Exception as e:
+                    # a request failing unexpectedly must not stop the requests after it being answered
+                    response = {'id': request.get('id'), 'error': '%s: %s' % (type(e).__name__, e)}
+                self._latencies.append(time.perf_counter() - received)
+                self.requests += 1
+                if not future.cancelled():
+                    future.set_result(response)
+
+    # target entity of a request, given by name or bounds
+    def _target(self, request: dict):
+        if 'bounds' in request:
+            x0, y0, x1, y1 = request['bounds']
+            return Entity(request.get('name'), Rectangle(Vector(x0, y0), Vector(x1, y1)), request.get('layer', 0))
+        target = self.world.find(request['name'])
+        if target is None:
+            raise KeyError(request['name'])
+        return target
+
+    # response to a single request
+    def apply(self, request: dict):
+        response = {'id': request.get('id')}
+        try:
+            op = request['op']
+            if op == 'find':
+                response['result'] = entity_json(self.world.find(request['name']))
+            elif op == 'find_near_to':
+                response['result'] = [entity_json(e)
+                                      for e in self.world.find_near_to(self._target(request), request['tolerance'],
+                                                                           request.get('layers'))]
+            elif op == 'remove':
+                self.world.remove(request['name'])
+                response['result'] = None
+            elif op == 'stats':
+                response['result'] = self.stats()
+            else:
+                raise ValueError('unknown op ' + repr(op))
+        except (KeyError, ValueError, TypeError) as e:
+            response['error'] = '%s: %s' % (type(e).__name__, e)
+        return response
+
+    # request counts and latency percentiles in seconds over the recent requests
+    def stats(self):
+        latencies = sorted(self._latencies)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'p50': percentile(latencies, 0.5),
+            'p90': percentile(latencies, 0.9),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else None,
+        }
+
+    # answer requests read as lines from the reader, writing responses as they complete
+    async def serve(self, reader, writer):
+        pending = set()
+
+        async def respond(request: dict):
+            response = await self.submit(request)
+            writer.write((json.dumps(response) + '\n').encode('utf-8'))
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                writer.write((json.dumps({'id': None, 'error': 'ValueError: %s' % e}) + '\n').encode('utf-8'))
+                continue
+            if not isinstance(request, dict):
+                writer.write((json.dumps({'id': None, 'error': 'ValueError: request must be a JSON object'}) +
+                              '\n').encode('utf-8'))
+                continue
+            task = asyncio.get_running_loop().create_task(respond(request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.wait(pending)
+        await writer.drain()
+
+
+async def serve_socket(server: WorldServer, path: str):
+    async def connected(reader, writer):
+        await server.serve(reader, writer)
+        writer.close()
+
+    async with server:
+        unix_server = await asyncio.start_unix_server(connected, path)
+        async with unix_server:
+            await unix_server.serve_forever()
+
+
+# represents standard input and output as a line reader and writer, which also work when redirected to files
+class _StandardStreams:
+    async def readline(self):
+        return await asyncio.get_running_loop().run_in_executor(None, sys.stdin.buffer.readline)
+
+    def write(self, data: bytes):
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    async def drain(self):
+        pass
+
+
+async def serve_stdio(server: WorldServer):
+    streams = _StandardStreams()
+    async with server:
+        await server.serve(streams, streams)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='serve world queries as JSON lines')
+    parser.add_argument('snapshot', help='world snapshot file written by World.save')
+    parser.add_argument('--socket', help='unix socket path to listen on instead of stdin and stdout')
+    parser.add_argument('--max-batch', type=int, default=256)
+    args = parser.parse_args()
+    server = WorldServer(World.load(args.snapshot), args.max_batch)
+    asyncio.run(serve_socket(server, args.socket) if args.socket else serve_stdio(server))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+from typing import List
+from collections.abc import Mapping
+from array import array
+import io
+import math
+import mmap as memory_map
+import struct
+import sys
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+
+
+# file layout: header of the magic, entity count, section offsets and the world's resolution and hash quantum, NaN
+# where None, then 8-byte aligned sections of
+#   name offsets  (count + 1) uint64 byte offsets into the name table
+#   name table    utf-8 names
+#   bounds        count * (x0, y0, x1, y1) float64
+#   layers        count int32
+#   name index    count int32 rows ordered by utf-8 name, for binary search
+_magic = {'little': b'SPCWLE02', 'big': b'SPCWBE02'}
+_header = struct.Struct('=8sQ5Q2d')
+
+
+def _aligned(offset: int):
+    return (offset + 7) // 8 * 8
+
+
+def _setting(value: float):
+    return math.nan if value is None else value
+
+
+def _optional(value: float):
+    return None if math.isnan(value) else value
+
+
+# write the snapshot image of entity columns in insertion order, of a world with the resolution and hash quantum,
+# to the binary file a section at a time, so that the columns are written as they are rather than copied into it
+def write(f, names: List[str], bounds: array, layers: array, resolution: float = None, hash_quantum: float = None):
+    encoded = [name.encode('utf-8') for name in names]
+    name_offsets = array('Q', [0])
+    for name in encoded:
+        name_offsets.append(name_offsets[-1] + len(name))
+    index = array('i', sorted(range(len(encoded)), key=encoded.__getitem__))
+    sections = [name_offsets, encoded, bounds, layers, index]
+    sizes = [name_offsets.itemsize * len(name_offsets), name_offsets[-1], bounds.itemsize * len(bounds),
+             layers.itemsize * len(layers), index.itemsize * len(index)]
+
+    offsets = []
+    offset = _header.size
+    for size in sizes:
+        offset = _aligned(offset)
+        offsets.append(offset)
+        offset += size
+    f.write(_header.pack(_magic[sys.byteorder], len(names), *offsets, _setting(resolution), _setting(hash_quantum)))
+    position = _header.size
+    for section_offset, section, size in zip(offsets, sections, sizes):
+        f.write(b'\0' * (section_offset - position))
+        if section is encoded:
+            for name in encoded:
+                f.write(name)
+        else:
+            f.write(section)
+        position = section_offset + size
+
+
+# snapshot image of entity columns in insertion order, of a world with the resolution and hash quantum, as a view
+# of the only copy made
+def encode(names: List[str], bounds: array, layers: array, resolution: float = None, hash_quantum: float = None):
+    image = io.BytesIO()
+    write(image, names, bounds, layers, resolution, hash_quantum)
+    return image.getbuffer()
+
+
+# (names, bounds, layers) columns of the entities of the world
+def _columns(world: World):
+    entities = list(world.entities.values())
+    bounds = array('d')
+    for entity in entities:
+        bl = entity.bounds.bottom_left
+        tr = entity.bounds.top_right
+        bounds.extend((bl.x, bl.y, tr.x, tr.y))
+    return [entity.name for entity in entities], bounds, array('i', [entity.layer for entity in entities])
+
+
+# snapshot image of the entities of the world
+def image_of(world: World):
+    return encode(*_columns(world), world.resolution, world.hash_quantum)
+
+
+# write the entities of the world to a snapshot file
+def save(world: World, path: str):
+    with open(path, 'wb') as f:
+        write(f, *_columns(world), world.resolution, world.hash_quantum)
+
+
+# represents the entities of a snapshot, created from the file as they are looked up
+class SnapshotEntities(Mapping):
+    def __init__(self, data):
+        if len(data) < _header.size:
+            raise ValueError('not a world snapshot')
+        magic, count, names_at, table_at, bounds_at, layers_at, index_at, resolution, hash_quantum = \
+            _header.unpack_from(data)
+        if magic not in _magic.values():
+            raise ValueError('not a world snapshot')
+        if magic != _magic[sys.byteorder]:
+            raise ValueError('world snapshot byte order does not match this machine')
+        view = memoryview(data)
+        self._data = data
+        self.resolution = _optional(resolution)
+        self.hash_quantum = _optional(hash_quantum)
+        self._count = count
+        self._name_offsets = view[names_at:names_at + 8 * (count + 1)].cast('Q')
+        self._names = view[table_at:table_at + self._name_offsets[count]]
+        self._bounds = view[bounds_at:bounds_at + 32 * count].cast('d')
+        self._layers = view[layers_at:layers_at + 4 * count].cast('i')
+        self._index = view[index_at:index_at + 4 * count].cast('i')
+        self._cache = {}
+        self._found = {}
+
+    def _name_bytes(self, row: int):
+        return self._names[self._name_offsets[row]:self._name_offsets[row + 1]]
+
+    # row of the named entity by binary search of the name index, or None if not found or not a name
+    def _row(self, name: str):
+        if not isinstance(name, str):
+            return None
+        key = name.encode('utf-8')
+        lo = 0
+        hi = self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_bytes(self._index[mid]).tobytes() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._name_bytes(self._index[lo]) == key:
+            return self._index[lo]
+        return None
+
+    def _entity(self, row: int):
+        entity = self._cache.get(row)
+        if entity is None:
+            b = self._bounds[4 * row:4 * row + 4]
+            entity = self._cache[row] = Entity(self._name_bytes(row).tobytes().decode('utf-8'),
+                                               Rectangle(Vector(b[0], b[1]), Vector(b[2], b[3])),
+                                               self._layers[row])
+        return entity
+
+    def __getitem__(self, name: str):
+        entity = self._found.get(name)
+        if entity is None:
+            row = self._row(name)
+            if row is None:
+                raise KeyError(name)
+            entity = self._found[name] = self._entity(row)
+        return entity
+
+    def __contains__(self, name):
+        return name in self._found or self._row(name) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (self._name_bytes(row).tobytes().decode('utf-8') for row in range(self._count))
+
+    def values(self):
+        return [self._entity(row) for row in range(self._count)]
+
+    def items(self):
+        return [(entity.name, entity) for entity in self.values()]
+
+
+# world whose entities are read from a snapshot file, mapped into memory or read in full
+def load(path: str, mmap: bool = True):
+    with open(path, 'rb') as f:
+        data = memory_map.mmap(f.fileno(), 0, access=memory_map.ACCESS_READ) if mmap else f.read()
+    return from_image(data)
+
+
+# world whose entities are read from a snapshot image, with the resolution and hash quantum it was saved with; the
+# snapped corners and content hash of its entities are computed on first use
+def from_image(data):
+    entities = SnapshotEntities(data)
+    world = World([], entities.hash_quantum, entities.resolution)
+    world.entities = entities
+    world._corners = None
+    return world
+
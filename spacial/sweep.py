@@ -0,0 +1,35 @@
+from typing import List
+from heapq import heappop, heappush
+from spacial.geometry import Line, Rectangle
+
+
+# index pairs (i, j), i < j, of rectangles that overlap, found by sweeping across x
+def overlapping_pairs(rectangles: List[Rectangle], tolerance: float):
+    pairs = []
+    active = {}
+    expiry = []
+    for i in sorted(range(len(rectangles)), key=lambda k: rectangles[k].bottom_left.x):
+        r = rectangles[i]
+        # rectangles ending before this one starts can never overlap a later one
+        while expiry and expiry[0][0] < r.bottom_left.x:
+            del active[heappop(expiry)[1]]
+        for j, other in active.items():
+            if other.bottom_left.y - tolerance <= r.top_right.y and r.bottom_left.y <= other.top_right.y + tolerance:
+                pairs.append((j, i) if j < i else (i, j))
+        active[i] = r
+        heappush(expiry, (r.top_right.x + tolerance, i))
+    pairs.sort()
+    return pairs
+
+
+# (i, j, intersection) for every pair of lines i < j that intersect between their end-points
+def find_intersections(lines: List[Line], tolerance: float, brute_force: bool = False):
+    if brute_force:
+        candidates = [(i, j) for i in range(len(lines)) for j in range(i + 1, len(lines))]
+    else:
+        # an intersection lies within tolerance of both bounds, so the bounds are within twice the tolerance
+        candidates = overlapping_pairs([line.bounds for line in lines], 2.0 * tolerance)
+    return [(i, j, intersection)
+            for i, j, intersection in [(i, j, lines[i].intersection_with(lines[j], tolerance, True))
+                                       for i, j in candidates]
+            if intersection is not None]
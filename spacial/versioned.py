@@ -0,0 +1,118 @@
+from typing import Iterable, Tuple
+from collections.abc import MutableMapping
+
+# entries per chunk, a power of two
+chunk_bits = 10
+chunk_size = 1 << chunk_bits
+# shards of the key index, a power of two
+shard_count = 1024
+
+
+# represents a mapping in insertion order, like a dict, whose copies share storage: entries are kept in fixed size
+# chunks and their positions in shards of a key index, and each copy duplicates a chunk or shard only when it first
+# changes one that it shares, so copying costs O(1) and a change costs no more than a chunk and a shard
+class VersionedDict(MutableMapping):
+    def __init__(self, items: Iterable[Tuple[object, object]] = ()):
+        # (key, value) entries or None where removed
+        self._chunks = []
+        # position of each key in the entries, sharded by hash
+        self._shards = [{} for _ in range(shard_count)]
+        self._length = 0
+        self._size = 0
+        # whether the outer lists and which chunks and shards are this copy's alone, so may be changed in place
+        self._own_lists = True
+        self._own_chunks = set()
+        self._own_shards = set(range(shard_count))
+        for key, value in items:
+            self[key] = value
+
+    # copy sharing all storage with this mapping until either changes it
+    def copy(self):
+        other = VersionedDict.__new__(VersionedDict)
+        other._chunks = self._chunks
+        other._shards = self._shards
+        other._length = self._length
+        other._size = self._size
+        other._own_lists = self._own_lists = False
+        other._own_chunks = set()
+        other._own_shards = set()
+        self._own_chunks = set()
+        self._own_shards = set()
+        return other
+
+    def _writable_lists(self):
+        if not self._own_lists:
+            self._chunks = list(self._chunks)
+            self._shards = list(self._shards)
+            self._own_lists = True
+
+    # shard of the key, copied first if shared
+    def _writable_shard(self, key):
+        i = hash(key) & (shard_count - 1)
+        if i not in self._own_shards:
+            self._writable_lists()
+            self._shards[i] = dict(self._shards[i])
+            self._own_shards.add(i)
+        return self._shards[i]
+
+    # chunk at the index, copied first if shared
+    def _writable_chunk(self, c: int):
+        if c not in self._own_chunks:
+            self._writable_lists()
+            self._chunks[c] = list(self._chunks[c])
+            self._own_chunks.add(c)
+        return self._chunks[c]
+
+    # rebuild the storage without removed entries once they outnumber those remaining
+    def _compact(self):
+        items = list(self.items())
+        self.__init__(items)
+
+    def __getitem__(self, key):
+        position = self._shards[hash(key) & (shard_count - 1)][key]
+        return self._chunks[position >> chunk_bits][position & (chunk_size - 1)][1]
+
+    def get(self, key, default=None):
+        position = self._shards[hash(key) & (shard_count - 1)].get(key)
+        if position is None:
+            return default
+        return self._chunks[position >> chunk_bits][position & (chunk_size - 1)][1]
+
+    def __contains__(self, key):
+        return key in self._shards[hash(key) & (shard_count - 1)]
+
+    # set the value of the key, keeping the position of a key already present
+    def __setitem__(self, key, value):
+        shard = self._writable_shard(key)
+        position = shard.get(key)
+        if position is None:
+            position = shard[key] = self._size
+            c = position >> chunk_bits
+            if c == len(self._chunks):
+                self._writable_lists()
+                self._chunks.append([])
+                self._own_chunks.add(c)
+            self._writable_chunk(c).append((key, value))
+            self._size += 1
+            self._length += 1
+        else:
+            self._writable_chunk(position >> chunk_bits)[position & (chunk_size - 1)] = (key, value)
+
+    def __delitem__(self, key):
+        position = self._writable_shard(key).pop(key)
+        self._writable_chunk(position >> chunk_bits)[position & (chunk_size - 1)] = None
+        self._length -= 1
+        if self._size > 2 * self._length + chunk_size:
+            self._compact()
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return (entry[0] for chunk in self._chunks for entry in chunk if entry is not None)
+
+    def values(self):
+        return [entry[1] for chunk in self._chunks for entry in chunk if entry is not None]
+
+    def items(self):
+        return [entry for chunk in self._chunks for entry in chunk if entry is not None]
@@ -1,9 +1,18 @@
 from typing import Iterable
-from spacial.geometry import Rectangle, Vector
+from heapq import merge
+from itertools import takewhile
+from spacial.geometry import Line, Rectangle, Vector
+from spacial.grid import Grid
+from spacial.pyramid import Pyramid
+from spacial.rtree import RTree, bounding, span
+from spacial.versioned import VersionedDict
+from spacial import fixed, sweep
 
 
 # represents a named entity
 class Entity:
+    __slots__ = ('name', 'bounds', 'layer')
+
     def __init__(self, name: str, bounds: Rectangle, layer: int):
         self.name = name
         self.bounds = bounds
@@ -15,26 +24,544 @@ class Entity:
 
 # represents world containing many entities
 class World:
-    def __init__(self, entities: Iterable[Entity]):
+    # number of centre grids retained, the least recently used discarded first
+    max_grids = 8
+    # number of layers queried together above which the grid of all entities is filtered instead of keeping a grid
+    # per layer
+    max_layer_grids = 4
+    # number of zoom levels of the aggregate pyramid
+    pyramid_levels = 12
+
+    # with a resolution, entity bounds are snapped to integer multiples of it, their integer corners kept for
+    # exact comparisons
+    def __init__(self, entities: Iterable[Entity], hash_quantum: float = None, resolution: float = None):
         self.entities = {}
-        for e in entities:
-            self.entities[e.name] = e
+        self.hash_quantum = hash_quantum
+        self.resolution = resolution
+        self._corners = None if resolution is None else {}
+        self._keys = None
+        self._hash = None
+        self._order = None
+        self._next_order = 0
+        self._centres = None
+        self._grids = {}
+        self._tree = None
+        self._layers = None
+        self._layer_trees = {}
+        self._pyramid = None
+        self._pool = None
+        self._changes = set()
+        if resolution is None:
+            # no index exists yet, so entities need only be stored, a later one replacing an earlier of the same name
+            stored = self.entities
+            for e in entities:
+                stored[e.name] = e
+        else:
+            for e in entities:
+                self._insert(e)
+
+    # add or replace entity, keeping the position of a replaced name
+    def _insert(self, entity: Entity):
+        self._writable()
+        name = entity.name
+        if self.resolution is not None:
+            corners = fixed.snap_rectangle(entity.bounds, self.resolution)
+            entity = Entity(name, fixed.rectangle_of(corners, self.resolution), entity.layer)
+        if name in self.entities:
+            self._unindex(name)
+        elif self._order is not None:
+            self._order[name] = self._next_order
+            self._next_order += 1
+        self.entities[name] = entity
+        if self._corners is not None:
+            self._corners[name] = corners
+            if self._keys is not None:
+                self._keys.setdefault(fixed.centre_key(corners), set()).add(name)
+        if self._hash is not None:
+            self._hash = (self._hash + self._entity_hash(entity)) % 2 ** 64
+        if self._centres is not None:
+            centre = entity.bounds.centre()
+            self._centres[name] = centre
+            for (_, layer), grid in self._grids.items():
+                if layer is None or layer == entity.layer:
+                    grid.insert(name, centre)
+        if self._tree is not None:
+            self._tree.insert(name, entity.bounds)
+        if self._layers is not None:
+            self._layers.setdefault(entity.layer, set()).add(name)
+        tree = self._layer_trees.get(entity.layer)
+        if tree is not None:
+            tree.insert(name, entity.bounds)
+        if self._pyramid is not None:
+            if self._pyramid.covers(entity.bounds.centre()):
+                self._pyramid.insert(name, entity.bounds)
+            else:
+                # the square is fixed when the pyramid is built, so it is rebuilt over the grown world on next use
+                self._pyramid = None
+
+    # remove named entity from the centre grids, bounds trees and layers
+    def _unindex(self, name: str):
+        entity = self.entities[name]
+        if self._hash is not None:
+            self._hash = (self._hash - self._entity_hash(entity)) % 2 ** 64
+        if self._centres is not None:
+            centre = self._centres.pop(name)
+            for (_, layer), grid in self._grids.items():
+                if layer is None or layer == entity.layer:
+                    grid.remove(name, centre)
+        if self._tree is not None:
+            self._tree.remove(name)
+        if self._layers is not None:
+            names = self._layers[entity.layer]
+            names.discard(name)
+            if not names:
+                del self._layers[entity.layer]
+                self._layer_trees.pop(entity.layer, None)
+        tree = self._layer_trees.get(entity.layer)
+        if tree is not None:
+            tree.remove(name)
+        if self._pyramid is not None:
+            self._pyramid.remove(name)
+        if self._corners is not None:
+            corners = self._corners.pop(name)
+            if self._keys is not None:
+                key = fixed.centre_key(corners)
+                names = self._keys[key]
+                names.discard(name)
+                if not names:
+                    del self._keys[key]
+
+    # close the pool of workers, which hold an image of the world as it is, and replace entities loaded lazily from
+    # a snapshot with a dict before they are changed
+    def _writable(self):
+        if self._pool is not None:
+            self.close()
+        # exact type tests, as an abstract base class check would cost more than the rest of an insert
+        entities_type = type(self.entities)
+        if entities_type is not dict and entities_type is not VersionedDict:
+            self.entities = dict(self.entities.items())
+
+    # insertion position of each entity, numbered on first use
+    def _positions(self):
+        if self._order is None:
+            self._order = {name: i for i, name in enumerate(self.entities)}
+            self._next_order = len(self._order)
+        return self._order
+
+    # centre of each entity, computed on first use
+    def _centre_map(self):
+        if self._centres is None:
+            self._centres = {name: entity.bounds.centre() for name, entity in self.entities.items()}
+        return self._centres
+
+    # hash of the entity with bounds snapped to the hash quantum
+    def _entity_hash(self, entity: Entity):
+        q = self.hash_quantum
+        bl = entity.bounds.bottom_left
+        tr = entity.bounds.top_right
+        return hash((entity.name, fixed.snap(bl.x, q), fixed.snap(bl.y, q), fixed.snap(tr.x, q), fixed.snap(tr.y, q),
+                     entity.layer))
+
+    # integer corners of each entity's bounds, snapped on first use if loaded with the bounds already snapped
+    def _corner_map(self):
+        if self._corners is None:
+            self._corners = {name: fixed.snap_rectangle(entity.bounds, self.resolution)
+                             for name, entity in self.entities.items()}
+        return self._corners
+
+    # names of entities by their exact integer centre key, gathered on first use
+    def _key_map(self):
+        if self._keys is None:
+            self._keys = {}
+            for name, corners in self._corner_map().items():
+                self._keys.setdefault(fixed.centre_key(corners), set()).add(name)
+        return self._keys
+
+    # names of the entities on each layer, gathered on first use
+    def _layer_map(self):
+        if self._layers is None:
+            self._layers = {}
+            for name, entity in self.entities.items():
+                self._layers.setdefault(entity.layer, set()).add(name)
+        return self._layers
+
+    # grid of the centres of entities on the layer, or all entities if None, with cells spanning twice the tolerance
+    def _grid(self, tolerance: float, layer: int = None):
+        grid = self._grids.pop((tolerance, layer), None)
+        if grid is None:
+            if len(self._grids) >= self.max_grids:
+                del self._grids[next(iter(self._grids))]
+            grid = Grid(2.0 * tolerance)
+            centres = self._centre_map()
+            for name in self.entities if layer is None else self._layer_map().get(layer, ()):
+                grid.insert(name, centres[name])
+        self._grids[(tolerance, layer)] = grid
+        return grid
 
-    # whether world is same as other world
+    # R-tree of entity bounds, packed on first use
+    def _rtree(self):
+        if self._tree is None:
+            self._tree = RTree((name, entity.bounds) for name, entity in self.entities.items())
+        return self._tree
+
+    # R-trees of the bounds of entities on the layers, or of all entities if None, each packed on first use
+    def _rtrees(self, layers: Iterable[int] = None):
+        if layers is None:
+            return [self._rtree()]
+        trees = []
+        for layer in set(layers):
+            tree = self._layer_trees.get(layer)
+            if tree is None and layer in self._layer_map():
+                tree = self._layer_trees[layer] = RTree((name, self.entities[name].bounds)
+                                                        for name in self._layer_map()[layer])
+            if tree is not None:
+                trees.append(tree)
+        return trees
+
+    # pyramid of aggregates over the bounds of the world, built on first use
+    def _lod(self):
+        if self._pyramid is None:
+            extent = self.bounds() or Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0))
+            self._pyramid = Pyramid(extent, self.pyramid_levels,
+                                    ((name, entity.bounds) for name, entity in self.entities.items()))
+        return self._pyramid
+
+    # keys for which the test holds across the R-trees of the layers
+    def _search(self, test, layers: Iterable[int] = None):
+        names = []
+        for tree in self._rtrees(layers):
+            names.extend(tree.search(test))
+        return names
+
+    # (distance, key) pairs in order of distance merged from walks of several R-trees
+    @staticmethod
+    def _merged(walks: list):
+        return walks[0] if len(walks) == 1 else merge(*walks)
+
+    # named entities in insertion order
+    def _in_order(self, names: list):
+        names.sort(key=self._positions().__getitem__)
+        return [self.entities[name] for name in names]
+
+    # whether world is same as other world, exactly if both are snapped to the same resolution and the tolerance
+    # is below it
     def equals(self, other: 'World', tolerance: float):
-        return len(set(self.entities.keys()).difference(other.entities.keys())) == 0 and all(
-            [self.entities[k].equals(other.entities[k], tolerance) for k in self.entities.keys()])
+        if len(self.entities) != len(other.entities):
+            return False
+        if self.resolution is not None and self.resolution == other.resolution and tolerance < self.resolution:
+            return self._corner_map() == other._corner_map() and all(
+                entity.layer == other.entities[name].layer for name, entity in self.entities.items())
+        for name, entity in self.entities.items():
+            other_entity = other.entities.get(name)
+            if other_entity is None or (other_entity is not entity and not entity.equals(other_entity, tolerance)):
+                return False
+        return True
+
+    # names of entities only in the other world, only in this world and in both but not equal
+    def diff(self, other: 'World', tolerance: float):
+        added = [name for name in other.entities if name not in self.entities]
+        removed = []
+        changed = []
+        for name, entity in self.entities.items():
+            other_entity = other.entities.get(name)
+            if other_entity is None:
+                removed.append(name)
+            elif other_entity is not entity and not entity.equals(other_entity, tolerance):
+                changed.append(name)
+        return added, removed, changed
+
+    # order-independent hash of the entities with coordinates snapped to the hash quantum, or None if not
+    # enabled; worlds with equal snapped content have equal hashes so a differing hash means a change. It is summed
+    # over the entities on first use and kept up to date as they change
+    def content_hash(self):
+        if self.hash_quantum is None:
+            return None
+        if self._hash is None:
+            self._hash = sum(self._entity_hash(entity) for entity in self.entities.values()) % 2 ** 64
+        return self._hash
 
     # found named entity or None if not found
     def find(self, name: str):
-        return self.entities[name] if name in self.entities else None
+        return self.entities.get(name)
+
+    # entities whose centres are at the specified point, only on the layers if given; with a resolution, snapped
+    # centres lie on a grid of half of it, so centres closer than that are compared exactly once snapped
+    def find_near_to(self, target: Entity, tolerance: float, layers: Iterable[int] = None):
+        if self.resolution is not None and tolerance < self.resolution / 2.0:
+            names = self._key_map().get(fixed.centre_key(fixed.snap_rectangle(target.bounds, self.resolution)), ())
+            if layers is not None:
+                layers = set(layers)
+                names = [name for name in names if self.entities[name].layer in layers]
+            return self._in_order([name for name in names if name != target.name])
+        # centres can only be equal within a positive tolerance
+        if not tolerance > 0.0:
+            return []
+        centre = target.bounds.centre()
+        if layers is not None:
+            layers = set(layers)
+            if len(layers) > self.max_layer_grids:
+                entities = self.entities
+                return self._in_order([name for name, c in self._grid(tolerance).near(centre)
+                                       if c.equals(centre, tolerance) and name != target.name and
+                                       entities[name].layer in layers])
+        names = [name
+                 for layer in ([None] if layers is None else layers)
+                 for name, c in self._grid(tolerance, layer).near(centre)
+                 if c.equals(centre, tolerance) and name != target.name]
+        return self._in_order(names)
+
+    # entities whose bounds overlap the rectangle, only on the layers if given
+    def query_rect(self, rect: Rectangle, tolerance: float, layers: Iterable[int] = None):
+        return self._in_order(self._search(lambda bounds: bounds.overlaps(rect, tolerance), layers))
+
+    # entities whose bounds contain the point, only on the layers if given; with a resolution, tolerances below it
+    # test the snapped point exactly
+    def query_point(self, point: Vector, tolerance: float, layers: Iterable[int] = None):
+        if self.resolution is not None and tolerance < self.resolution:
+            snapped = fixed.snap_vector(point, self.resolution)
+            corners = self._corner_map()
+            return self._in_order([name
+                                   for name in self._search(lambda b: b.contains(point, self.resolution), layers)
+                                   if fixed.contains(corners[name], snapped)])
+        return self._in_order(self._search(lambda bounds: bounds.contains(point, tolerance), layers))
+
+    # (distance, name) pairs of entity centres on the layers in order of distance from the point
+    def _by_distance(self, point: Vector, layers: Iterable[int] = None):
+        centres = self._centre_map()
+        return self._merged([tree.nearest(point, lambda name, bounds: (centres[name] - point).magnitude())
+                             for tree in self._rtrees(layers)])
 
-    # entities whose centres are at the specified point
-    def find_near_to(self, target: Entity, tolerance: float):
-        return [entity
-                for name, entity in self.entities.items()
-                if entity.bounds.centre().equals(target.bounds.centre(), tolerance) and name != target.name]
+    # named entities ordered by distance, ties in insertion order
+    def _by_distance_in_order(self, pairs: list):
+        order = self._positions()
+        pairs.sort(key=lambda pair: (pair[0], order[pair[1]]))
+        return [self.entities[name] for _, name in pairs]
+
+    # the k entities whose centres are closest to the point, nearest first, only on the layers if given
+    def nearest(self, point: Vector, k: int, layers: Iterable[int] = None):
+        if k <= 0:
+            return []
+        pairs = []
+        for d, name in self._by_distance(point, layers):
+            # take every entity tied with the kth so that ties resolve in insertion order
+            if len(pairs) >= k and d > pairs[-1][0]:
+                break
+            pairs.append((d, name))
+        return self._by_distance_in_order(pairs)[:k]
+
+    # entities whose centres are within the radius of the point, nearest first, only on the layers if given
+    def within_radius(self, point: Vector, radius: float, layers: Iterable[int] = None):
+        return self._by_distance_in_order(list(takewhile(lambda pair: pair[0] <= radius,
+                                                         self._by_distance(point, layers))))
+
+    # (entity, point) pairs of entities whose boundaries the line crosses, each with the crossing nearest the line's
+    # start, ordered along the line with ties in insertion order, or just the first pair if first_only, only on the
+    # layers if given; with a resolution, tolerances below it snap the line and test crossings exactly
+    def raycast(self, line: Line, tolerance: float, first_only: bool = False, layers: Iterable[int] = None):
+        exact = self.resolution is not None and tolerance < self.resolution
+        if exact:
+            a = fixed.snap_vector(line.start_point, self.resolution)
+            z = fixed.snap_vector(line.end_point, self.resolution)
+            line = Line(Vector(a[0] * self.resolution, a[1] * self.resolution),
+                        Vector(z[0] * self.resolution, z[1] * self.resolution))
+            corners = self._corner_map()
+            if a == z:
+                # the line snaps to a point, which crosses only the boundaries through it
+                point = line.start_point
+                hits = [(entity, point) for entity in self._in_order(
+                    [name for name in self._search(lambda r: r.contains(point, self.resolution), layers)
+                     if fixed.crosses_boundary(corners[name], a, z)])]
+                return hits[:1] if first_only else hits
+        start = line.start_point
+        u = line.unit_direction
+        b = line.bounds
+        # crossings lie within the tolerance of both the line's bounds and the entity's, and off the line only by
+        # rounding, so nodes are tested widened by a margin covering both
+        rounding = 1e-9 * (1.0 + max(abs(b.bottom_left.x), abs(b.bottom_left.y),
+                                     abs(b.top_right.x), abs(b.top_right.y)))
+        margin = 2.0 * tolerance + rounding
+        extent = span(b, start, u, margin)
+        entries = {}
+
+        # least distance from the start to the part of the line within the rectangle
+        def bound(r: Rectangle):
+            s = span(r, start, u, margin)
+            if s is None:
+                return None
+            lo = max(s[0], extent[0])
+            hi = min(s[1], extent[1])
+            if lo > hi:
+                return None
+            return 0.0 if lo <= 0.0 <= hi else min(abs(lo), abs(hi))
+
+        # entries are pruned by their bounds as nodes are before their crossings are found
+        def distance(name: str, bounds: Rectangle):
+            if bound(bounds) is None:
+                return None
+            crossings = bounds.intersections_with(line, tolerance)
+            if not crossings:
+                return None
+            point = min(crossings, key=lambda p: (p - start).magnitude())
+            entries[name] = point
+            return (point - start).magnitude()
+
+        # the crossing nearest the start is where the line enters the bounds, or leaves them if it starts inside
+        def exact_distance(name: str, bounds: Rectangle):
+            if bound(bounds) is None:
+                return None
+            c = corners[name]
+            if not fixed.crosses_boundary(c, a, z):
+                return None
+            t0, t1 = bounds.clip(line, rounding)
+            inside = fixed.contains((c[0] + 1, c[1] + 1, c[2] - 1, c[3] - 1), a)
+            point = entries[name] = start + (line.end_point - start) * (t1 if inside else t0)
+            return (point - start).magnitude()
+
+        pairs = []
+        for d, name in self._merged([tree.best_first(bound, exact_distance if exact else distance)
+                                     for tree in self._rtrees(layers)]):
+            # take every entity tied with the first so that ties resolve in insertion order
+            if first_only and pairs and d > pairs[0][0]:
+                break
+            pairs.append((d, name))
+        order = self._positions()
+        pairs.sort(key=lambda pair: (pair[0], order[pair[1]]))
+        hits = [(self.entities[name], entries[name]) for _, name in pairs]
+        return hits[:1] if first_only else hits
+
+    # pairs of entities whose bounds overlap, optionally only those on the 'same' or a 'cross' layer
+    def overlapping_pairs(self, tolerance: float, layers: str = None):
+        if layers not in (None, 'same', 'cross'):
+            raise ValueError("layers must be None, 'same' or 'cross'")
+        entities = list(self.entities.values())
+        pairs = [(entities[i], entities[j])
+                 for i, j in sweep.overlapping_pairs([entity.bounds for entity in entities], tolerance)]
+        if layers == 'same':
+            return [(a, b) for a, b in pairs if a.layer == b.layer]
+        if layers == 'cross':
+            return [(a, b) for a, b in pairs if a.layer != b.layer]
+        return pairs
+
+    # names of entities whose bounds 'overlap' the bounds or whose centres are 'near' its centre, within the tolerance
+    def _matches(self, bounds: Rectangle, predicate: str, tolerance: float):
+        if predicate == 'overlaps':
+            return self._rtree().search(lambda b: b.overlaps(bounds, tolerance))
+        # centres can only be equal within a positive tolerance
+        if not tolerance > 0.0:
+            return []
+        centre = bounds.centre()
+        return [name for name, c in self._grid(tolerance).near(centre) if c.equals(centre, tolerance)]
+
+    def _join(self, other: 'World', predicate: str, tolerance: float):
+        for a in list(self.entities.values()):
+            for b in other._in_order(other._matches(a.bounds, predicate, tolerance)):
+                yield a, b
+
+    # pairs (a, b) of an entity of this world and one of the other whose bounds 'overlap' or whose centres are 'near',
+    # within the tolerance, generated in insertion order of a then b by probing the other's index; with several
+    # workers this world's entities are split into chunks probed by a pool of worker processes
+    def join(self, other: 'World', predicate: str, tolerance: float, workers: int = 1):
+        if predicate not in ('overlaps', 'near'):
+            raise ValueError("predicate must be 'overlaps' or 'near'")
+        if workers > 1:
+            from spacial import parallel
+            return parallel.join(self, other, predicate, tolerance, workers)
+        return self._join(other, predicate, tolerance)
+
+    # smallest rectangle covering every entity, or those on the layers if given, or None if there are none
+    def bounds(self, layers: Iterable[int] = None):
+        return bounding(tree.root.bounds for tree in self._rtrees(layers) if tree.root.bounds is not None)
+
+    # aggregates of the entities whose centres fall in each cell overlapping the rectangle at the zoom level, where
+    # level z splits a square over the world's bounds when first asked into 2**z by 2**z cells
+    def aggregates(self, rect: Rectangle, zoom: int):
+        return self._lod().query(rect, zoom)
+
+    # number of entities on each layer that has any
+    def layer_counts(self):
+        return {layer: len(names) for layer, names in self._layer_map().items()}
+
+    # add entity, replacing any entity of the same name
+    def add(self, entity: Entity):
+        self._insert(entity)
+        self._changes.add(entity.name)
+
+    # translate the named entity by the offset
+    def move(self, name: str, offset: Vector):
+        entity = self.entities[name]
+        self.add(Entity(name, entity.bounds + offset, entity.layer))
+
+    # change the width and height of the named entity, keeping its centre
+    def resize(self, name: str, size: Vector):
+        entity = self.entities[name]
+        centre = entity.bounds.centre()
+        self.add(Entity(name, Rectangle(centre - size / 2.0, centre + size / 2.0), entity.layer))
 
     # remove the named entity
     def remove(self, name: str):
+        self._writable()
+        self._unindex(name)
         del self.entities[name]
+        if self._order is not None:
+            del self._order[name]
+        self._changes.add(name)
+
+    # results of (method, *args) queries such as ('find_near_to', target, tolerance) in input order,
+    # answered by a pool of worker processes sharing the world's snapshot image when there are several workers; the
+    # pool is kept for later calls until the world changes or is closed
+    def batch_query(self, queries: Iterable[tuple], workers: int = 1):
+        from spacial import parallel
+        return parallel.batch_query(self, queries, workers)
+
+    # stop any pool of workers kept for batch queries and joins
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    # write the world to a binary snapshot file
+    def save(self, path: str):
+        from spacial import snapshot
+        snapshot.save(self, path)
+
+    # world read from a binary snapshot file, mapping it into memory and creating entities as they are found
+    @staticmethod
+    def load(path: str, mmap: bool = True):
+        from spacial import snapshot
+        return snapshot.load(path, mmap)
+
+    # the mapping as versioned storage, moved into it when the first version is taken
+    @staticmethod
+    def _versioned(mapping):
+        return mapping if isinstance(mapping, VersionedDict) else VersionedDict(mapping.items())
+
+    # version of the world as it is now, sharing the storage of its entities, centres, positions, centre grids and
+    # R-trees so that it is taken in O(1) and each copies only the parts it changes afterwards; the first version
+    # moves them into versioned storage, and a version builds any other index on first use, so readers querying a
+    # version need no locks
+    def snapshot(self):
+        version = World([], self.hash_quantum, self.resolution)
+        self.entities = self._versioned(self.entities)
+        version.entities = self.entities.copy()
+        version._hash = self._hash
+        if self._corners is not None:
+            self._corners = self._versioned(self._corners)
+        version._corners = None if self._corners is None else self._corners.copy()
+        if self._centres is not None:
+            self._centres = self._versioned(self._centres)
+            version._centres = self._centres.copy()
+        if self._order is not None:
+            self._order = self._versioned(self._order)
+            version._order = self._order.copy()
+            version._next_order = self._next_order
+        version._grids = {key: grid.copy() for key, grid in self._grids.items()}
+        if self._tree is not None:
+            version._tree = self._tree.copy()
+        version._layer_trees = {layer: tree.copy() for layer, tree in self._layer_trees.items()}
+        return version
+
+    # names of entities added, moved, resized or removed since the last call
+    def take_changes(self):
+        changes = self._changes
+        self._changes = set()
+        return changes
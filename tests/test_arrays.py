@@ -0,0 +1,200 @@
+import unittest
+import random
+from spacial.geometry import Line, Rectangle, Vector
+
+try:
+    import numpy
+    from spacial.arrays import VectorArray, RectangleArray, LineArray
+except ImportError:
+    numpy = None
+
+
+tolerance: float = 1e-7
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class VectorArrayTests(unittest.TestCase):
+    def test_init(self):
+        a = VectorArray([1.0, 2.0], [3.0, 4.0])
+        self.assertEqual(len(a), 2)
+        self.assertEqual(a.x.dtype, numpy.float64)
+        self.assertTrue(a[1].equals(Vector(2.0, 4.0), tolerance))
+
+    def test_from_vectors(self):
+        a = VectorArray.from_vectors([Vector(1.0, 2.0), Vector(3.0, 4.0)])
+        self.assertEqual(a.x.tolist(), [1.0, 3.0])
+        self.assertEqual(a.y.tolist(), [2.0, 4.0])
+        self.assertEqual([(v.x, v.y) for v in a], [(1.0, 2.0), (3.0, 4.0)])
+
+    def test_add(self):
+        a = VectorArray([5.0, 1.0], [3.0, 2.0])
+        self.assertTrue(all((a + VectorArray([6.0, 1.0], [1.0, 1.0])).equals(VectorArray([11.0, 2.0], [4.0, 3.0]),
+                                                                             tolerance)))
+        self.assertTrue(all((a + Vector(1.0, 1.0)).equals(VectorArray([6.0, 2.0], [4.0, 3.0]), tolerance)))
+
+    def test_sub(self):
+        a = VectorArray([6.0, 1.0], [1.0, 2.0])
+        self.assertTrue(all((a - Vector(5.0, 3.0)).equals(VectorArray([1.0, -4.0], [-2.0, -1.0]), tolerance)))
+
+    def test_neg(self):
+        a = VectorArray([5.0, -1.0], [3.0, 2.0])
+        self.assertTrue(all((-a).equals(VectorArray([-5.0, 1.0], [-3.0, -2.0]), tolerance)))
+
+    def test_mul(self):
+        a = VectorArray([5.0, 1.0], [3.0, 2.0])
+        self.assertTrue(all((a * 3.0).equals(VectorArray([15.0, 3.0], [9.0, 6.0]), tolerance)))
+
+    def test_truediv(self):
+        a = VectorArray([15.0, 3.0], [9.0, 6.0])
+        self.assertTrue(all((a / 3.0).equals(VectorArray([5.0, 1.0], [3.0, 2.0]), tolerance)))
+
+    def test_equals(self):
+        a = VectorArray([1.0, 1.0, 1.0], [2.0, 2.0, 2.0])
+        b = VectorArray([1.0 + tolerance, 1.0 + tolerance, 1.0], [2.0 - tolerance, 2.0, 2.0 + 3.0 * tolerance])
+        self.assertEqual(a.equals(b, tolerance * 2.0).tolist(), [True, True, False])
+        # matches the scalar comparison at the tolerance boundary
+        c = VectorArray([1.5, 1.0], [2.0, 2.5])
+        self.assertEqual(c.equals(Vector(1.0, 2.0), 0.5).tolist(),
+                         [Vector(1.5, 2.0).equals(Vector(1.0, 2.0), 0.5),
+                          Vector(1.0, 2.5).equals(Vector(1.0, 2.0), 0.5)])
+
+    def test_dot(self):
+        a = VectorArray([0.0, 1.0], [1.0, 0.0])
+        self.assertEqual(a.dot(Vector(0.0, 1.0)).tolist(), [1.0, 0.0])
+
+    def test_magnitude(self):
+        self.assertEqual(VectorArray([3.0, 0.0], [4.0, 2.0]).magnitude().tolist(), [5.0, 2.0])
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class RectangleArrayTests(unittest.TestCase):
+    def setUp(self):
+        self.rectangles = [Rectangle(Vector(-2.0, -3.0), Vector(1.0, 4.0)),
+                           Rectangle(Vector(2.0, 2.0), Vector(0.0, 0.0))]
+        self.array = RectangleArray.from_rectangles(self.rectangles)
+
+    def test_init(self):
+        a = RectangleArray(VectorArray([1.0, 0.0], [4.0, 0.0]), VectorArray([-2.0, 2.0], [-3.0, 2.0]))
+        self.assertEqual(len(a), 2)
+        for r1, r2 in zip(a, self.rectangles):
+            self.assertTrue(r1.equals(r2, tolerance))
+
+    def test_add(self):
+        ofs = Vector(1.0, 2.0)
+        self.assertTrue(all((self.array + ofs).equals(RectangleArray.from_rectangles(r + ofs for r in self.rectangles),
+                                                      tolerance)))
+
+    def test_sub(self):
+        ofs = Vector(1.0, 2.0)
+        self.assertTrue(all((self.array - ofs).equals(RectangleArray.from_rectangles(r - ofs for r in self.rectangles),
+                                                      tolerance)))
+
+    def test_mul(self):
+        self.assertTrue(all((self.array * 3.0).equals(RectangleArray.from_rectangles(r * 3.0 for r in self.rectangles),
+                                                      tolerance)))
+
+    def test_truediv(self):
+        self.assertTrue(all((self.array / 3.0).equals(RectangleArray.from_rectangles(r / 3.0 for r in self.rectangles),
+                                                      tolerance)))
+
+    def test_equals(self):
+        self.assertEqual(self.array.equals(self.rectangles[0], tolerance).tolist(), [True, False])
+
+    def test_centre(self):
+        c = self.array.centre()
+        for i, r in enumerate(self.rectangles):
+            self.assertTrue(c[i].equals(r.centre(), tolerance))
+
+    def test_contains(self):
+        points = [Vector(0.0, 0.0), Vector(1.0, 0.0), Vector(2.0, 0.0), Vector(0.0, -4.0)]
+        for p in points:
+            self.assertEqual(self.array.contains(p, tolerance).tolist(),
+                             [r.contains(p, tolerance) for r in self.rectangles])
+        self.assertEqual(self.array.contains(VectorArray.from_vectors(points[:2]), tolerance).tolist(), [True, True])
+
+    def test_overlaps(self):
+        other = Rectangle(Vector(1.5, 1.5), Vector(3.0, 3.0))
+        self.assertEqual(self.array.overlaps(other, tolerance).tolist(), [False, True])
+
+
+def random_lines(count: int, seed: int):
+    rng = random.Random(seed)
+    lines = [Line(Vector(rng.uniform(0.0, 10.0), rng.uniform(0.0, 10.0)),
+                  Vector(rng.uniform(0.0, 10.0), rng.uniform(0.0, 10.0))) for _ in range(count)]
+    # include parallel and collinear lines
+    lines.append(Line(Vector(0.0, 0.0), Vector(1.0, 1.0)))
+    lines.append(Line(Vector(0.0, 1.0), Vector(1.0, 2.0)))
+    lines.append(Line(Vector(2.0, 2.0), Vector(3.0, 3.0)))
+    return lines
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class LineArrayTests(unittest.TestCase):
+    def test_init(self):
+        lines = [Line(Vector(0.0, 0.0), Vector(3.0, 4.0)), Line(Vector(1.0, 1.0), Vector(1.0, -1.0))]
+        a = LineArray.from_lines(lines)
+        self.assertEqual(len(a), 2)
+        for ln, ln_array in zip(lines, a):
+            self.assertTrue(ln.start_point.equals(ln_array.start_point, tolerance))
+            self.assertTrue(ln.end_point.equals(ln_array.end_point, tolerance))
+        self.assertTrue(a.unit_direction[0].equals(Vector(0.6, 0.8), tolerance))
+        self.assertTrue(a.bounds[1].equals(lines[1].bounds, tolerance))
+
+    def test_is_parallel_to(self):
+        a = LineArray.from_lines([Line(Vector(3.0, 4.0), Vector(4.0, 6.0)), Line(Vector(0.0, 0.0), Vector(1.0, 0.0))])
+        self.assertEqual(a.is_parallel_to(Line(Vector(-1.0, 1.0), Vector(-0.5, 2.0)), tolerance).tolist(),
+                         [True, False])
+
+    def test_intersection_with(self):
+        lines = random_lines(60, 1)
+        a = LineArray.from_lines(lines[:31])
+        b = LineArray.from_lines(lines[-31:])
+        for bounded in [True, False]:
+            points, valid = a.intersection_with(b, tolerance, bounded)
+            for i, (l1, l2) in enumerate(zip(lines[:31], lines[-31:])):
+                expected = l1.intersection_with(l2, tolerance, bounded)
+                self.assertEqual(bool(valid[i]), expected is not None)
+                if expected is not None:
+                    self.assertEqual((points.x[i], points.y[i]), (expected.x, expected.y))
+
+    def test_intersection_with_line(self):
+        lines = random_lines(20, 2)
+        other = Line(Vector(0.0, 5.0), Vector(10.0, 5.0))
+        points, valid = LineArray.from_lines(lines).intersection_with(other, tolerance, True)
+        for i, ln in enumerate(lines):
+            expected = ln.intersection_with(other, tolerance, True)
+            self.assertEqual(bool(valid[i]), expected is not None)
+            if expected is not None:
+                self.assertTrue(points[i].equals(expected, tolerance))
+
+    def test_clip(self):
+        lines = random_lines(60, 4)
+        r = Rectangle(Vector(2.0, 3.0), Vector(6.0, 5.0))
+        t0, t1, valid = LineArray.from_lines(lines).clip(r, tolerance)
+        for i, ln in enumerate(lines):
+            expected = r.clip(ln, tolerance)
+            self.assertEqual(bool(valid[i]), expected is not None)
+            if expected is not None:
+                self.assertEqual((float(t0[i]), float(t1[i])), expected)
+        rectangles = [Rectangle(Vector(x, x), Vector(x + 2.0, x + 1.0)) for x in range(len(lines))]
+        clipped, valid = LineArray.from_lines(lines).clipped(RectangleArray.from_rectangles(rectangles), tolerance)
+        for i, (ln, rect) in enumerate(zip(lines, rectangles)):
+            expected = rect.clipped(ln, tolerance)
+            self.assertEqual(bool(valid[i]), expected is not None)
+            if expected is not None:
+                self.assertTrue(clipped[i].start_point.equals(expected.start_point, tolerance))
+                self.assertTrue(clipped[i].end_point.equals(expected.end_point, tolerance))
+
+    def test_intersections(self):
+        lines = random_lines(40, 3)
+        first, second, points = LineArray.from_lines(lines).intersections(tolerance, True)
+        expected = [(i, j, lines[i].intersection_with(lines[j], tolerance, True))
+                    for i in range(len(lines)) for j in range(i + 1, len(lines))]
+        expected = [(i, j, p) for i, j, p in expected if p is not None]
+        self.assertEqual(list(zip(first.tolist(), second.tolist())), [(i, j) for i, j, p in expected])
+        for k, (i, j, p) in enumerate(expected):
+            self.assertTrue(points[k].equals(p, tolerance))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+from spacial.builder import WorldBuilder
+
+
+tolerance: float = 1e-7
+
+rows = [
+    ("I", 0.0, 0.0, 1.0, 1.0, 1),
+    ("Thing", 3.0, 4.0, 2.0, 2.0, 2),
+    ("Other", -1.0, 0.0, 0.0, 1.0, 1),
+    ("I", 5.0, 5.0, 6.0, 6.0, 3),
+]
+
+
+def world_of(rows: list):
+    return World(Entity(name, Rectangle(Vector(x0, y0), Vector(x1, y1)), layer)
+                 for name, x0, y0, x1, y1, layer in rows)
+
+
+class WorldBuilderTests(unittest.TestCase):
+    def test_init(self):
+        b = WorldBuilder()
+        self.assertEqual(len(b), 0)
+        self.assertEqual(len(b.build().entities), 0)
+
+    def test_add_rows(self):
+        progress = []
+        b = WorldBuilder(chunk_size=3, progress=progress.append)
+        w = b.add_rows(iter(rows)).build()
+        self.assertEqual(progress, [3, 4])
+        self.assertEqual(len(b), 3)
+        self.assertEqual(list(w.entities), ["I", "Thing", "Other"])
+        self.assertTrue(w.equals(world_of(rows), tolerance))
+        self.assertEqual(w.find("I").layer, 3)
+        self.assertTrue(w.find("Thing").bounds.equals(Rectangle(Vector(2.0, 2.0), Vector(3.0, 4.0)), tolerance))
+
+    def test_add_csv(self):
+        text = "name,x0,y0,x1,y1,layer\n" + "".join("%s,%r,%r,%r,%r,%d\n" % row for row in rows)
+        w = WorldBuilder().add_csv(io.StringIO(text), header=True).build()
+        self.assertTrue(w.equals(world_of(rows), tolerance))
+
+    def test_add_ndjson(self):
+        keys = ["name", "x0", "y0", "x1", "y1", "layer"]
+        text = "\n".join(json.dumps(dict(zip(keys, row))) for row in rows) + "\n\n"
+        w = WorldBuilder().add_ndjson(io.StringIO(text)).build()
+        self.assertTrue(w.equals(world_of(rows), tolerance))
+
+    def test_build_indexes(self):
+        w = WorldBuilder().add_rows(rows).build()
+        self.assertEqual([e.name for e in w.query_rect(Rectangle(Vector(-2.0, 0.5), Vector(-0.5, 3.0)), tolerance)],
+                         ["Other"])
+        self.assertEqual([e.name for e in w.nearest(Vector(5.0, 4.0), 1)], ["I"])
+        self.assertEqual(len(w.entities._cache), 2)
+        w.add(Entity("New", Rectangle(Vector(7.0, 7.0), Vector(8.0, 8.0)), 1))
+        self.assertEqual(list(w.entities), ["I", "Thing", "Other", "New"])
+        self.assertTrue(w.equals(world_of(rows + [("New", 7.0, 7.0, 8.0, 8.0, 1)]), tolerance))
+
+    def test_save(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            WorldBuilder().add_rows(rows).save(path)
+            self.assertTrue(World.load(path).equals(world_of(rows), tolerance))
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import random
+from spacial import fixed
+from spacial.geometry import Line, Rectangle, Vector
+
+
+tolerance: float = 1e-7
+
+
+class FixedTests(unittest.TestCase):
+    def test_snap(self):
+        self.assertEqual(fixed.snap(0.26, 0.1), 3)
+        self.assertEqual(fixed.snap(-0.26, 0.1), -3)
+        # halves round up, so congruent rectangles snap to the same size wherever they are
+        self.assertEqual([fixed.snap(v, 1.0) for v in [-1.5, -0.5, 0.5, 1.5, 2.5]], [-1, 0, 1, 2, 3])
+        self.assertEqual(fixed.snap_rectangle(Rectangle(Vector(0.5, 0.5), Vector(1.5, 1.5)), 1.0), (1, 1, 2, 2))
+        self.assertEqual(fixed.snap_rectangle(Rectangle(Vector(1.5, 1.5), Vector(2.5, 2.5)), 1.0), (2, 2, 3, 3))
+        self.assertEqual(fixed.snap_vector(Vector(1.04, -2.0), 0.1), (10, -20))
+        r = Rectangle(Vector(0.04, 0.96), Vector(2.01, -1.0))
+        self.assertEqual(fixed.snap_rectangle(r, 0.1), (0, -10, 20, 10))
+        self.assertTrue(fixed.rectangle_of((0, -10, 20, 10), 0.1).equals(
+            Rectangle(Vector(0.0, -1.0), Vector(2.0, 1.0)), tolerance))
+
+    def test_centre_key(self):
+        self.assertEqual(fixed.centre_key((0, 0, 3, 1)), (3, 1))
+        self.assertEqual(fixed.centre_key((1, -1, 2, 2)), (3, 1))
+
+    def test_contains(self):
+        corners = (0, 0, 10, 5)
+        self.assertTrue(fixed.contains(corners, (0, 0)))
+        self.assertTrue(fixed.contains(corners, (10, 5)))
+        self.assertTrue(fixed.contains(corners, (3, 4)))
+        self.assertFalse(fixed.contains(corners, (11, 4)))
+        self.assertFalse(fixed.contains(corners, (3, -1)))
+
+    def test_orientation(self):
+        self.assertEqual(fixed.orientation((0, 0), (10, 0), (5, 1)), 1)
+        self.assertEqual(fixed.orientation((0, 0), (10, 0), (5, -1)), -1)
+        self.assertEqual(fixed.orientation((0, 0), (10, 0), (20, 0)), 0)
+        # exact far beyond the precision of floats
+        big = 10 ** 20
+        self.assertEqual(fixed.orientation((0, 0), (big, big + 1), (big - 1, big)), 1)
+
+    def test_segments_intersect(self):
+        self.assertTrue(fixed.segments_intersect((0, 0), (10, 10), (0, 10), (10, 0)))
+        self.assertTrue(fixed.segments_intersect((0, 0), (10, 10), (10, 10), (20, 0)))
+        self.assertTrue(fixed.segments_intersect((0, 0), (10, 0), (5, 0), (20, 0)))
+        self.assertFalse(fixed.segments_intersect((0, 0), (10, 0), (11, 0), (20, 0)))
+        self.assertFalse(fixed.segments_intersect((0, 0), (10, 10), (0, 1), (9, 10)))
+
+    def test_crosses_boundary(self):
+        corners = (0, 0, 10, 10)
+        self.assertTrue(fixed.crosses_boundary(corners, (-5, 5), (15, 5)))
+        self.assertTrue(fixed.crosses_boundary(corners, (5, 5), (5, 15)))
+        self.assertTrue(fixed.crosses_boundary(corners, (-5, 10), (15, 10)))
+        self.assertFalse(fixed.crosses_boundary(corners, (2, 2), (8, 8)))
+        self.assertFalse(fixed.crosses_boundary(corners, (-5, 11), (15, 11)))
+
+    def test_crosses_boundary_matches_intersections_with(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            x0 = rng.randint(-20, 20)
+            y0 = rng.randint(-20, 20)
+            corners = (x0, y0, x0 + rng.randint(1, 20), y0 + rng.randint(1, 20))
+            a = (rng.randint(-40, 40), rng.randint(-40, 40))
+            b = (rng.randint(-40, 40), rng.randint(-40, 40))
+            if a == b:
+                continue
+            crossings = fixed.rectangle_of(corners, 1.0).intersections_with(
+                Line(Vector(*a), Vector(*b)), tolerance)
+            # not conversely, as a line along an edge is parallel to it and only reported crossing the edges at its ends
+            if crossings:
+                self.assertTrue(fixed.crosses_boundary(corners, a, b))
+
+
+if __name__ == '__main__':
+    unittest.main()
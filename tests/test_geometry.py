@@ -1,5 +1,7 @@
 import unittest
-from spacial.geometry import Vector, Matrix, Rectangle, Line
+import pickle
+import random
+from spacial.geometry import Vector, Matrix, Rectangle, Line, cache_stats, reset_cache_stats
 
 
 tolerance: float = 1e-7
@@ -56,6 +58,18 @@ class VectorTests(unittest.TestCase):
     def test_magnitude(self):
         self.assertEqual(Vector(3.0, 4.0).magnitude(), 5.0)
 
+    def test_immutable(self):
+        p = Vector(1.0, 2.0)
+        with self.assertRaises(AttributeError):
+            p.x = 10.0
+        with self.assertRaises(AttributeError):
+            p.y += 1.0
+        with self.assertRaises(AttributeError):
+            del p.x
+        self.assertTrue(p.equals(Vector(1.0, 2.0), tolerance))
+        copied = pickle.loads(pickle.dumps(p))
+        self.assertTrue(copied.equals(p, tolerance))
+
 
 class MatrixTests(unittest.TestCase):
     def test_init(self):
@@ -124,6 +138,10 @@ class RectangleTests(unittest.TestCase):
         self.assertTrue(r.top_right.equals(tr, tolerance))
         self.assertTrue(r.bottom_right.equals(Vector(tr.x, bl.y), tolerance))
         self.assertTrue(r.top_left.equals(Vector(bl.x, tr.y), tolerance))
+        # corners are shared, so cannot be changed under the rectangle
+        with self.assertRaises(AttributeError):
+            bl.x = 10.0
+        self.assertEqual(r.bottom_left.x, -2.0)
 
     def test_add(self):
         r = Rectangle(Vector(-2.0, -3.0), Vector(1.0, 4.0))
@@ -166,6 +184,27 @@ class RectangleTests(unittest.TestCase):
         r2 = Rectangle(Vector(-2.0, -1.0), Vector(2.0, 3.0))
         self.assertTrue(r1.equals(r2, tolerance))
 
+    def test_centre(self):
+        r = Rectangle(Vector(-2.0, -3.0), Vector(1.0, 4.0))
+        self.assertTrue(r.centre().equals(Vector(-0.5, 0.5), tolerance))
+        self.assertIs(r.centre(), r.centre())
+        # the cached centre is shared, so cannot be changed by a caller
+        with self.assertRaises(AttributeError):
+            r.centre().x += 100.0
+        self.assertTrue(r.centre().equals(Vector(-0.5, 0.5), tolerance))
+
+    def test_boundaries(self):
+        r = Rectangle(Vector(-2.0, -3.0), Vector(1.0, 4.0))
+        left, right, bottom, top = r.boundaries()
+        self.assertTrue(left.start_point.equals(r.bottom_left, tolerance) and
+                        left.end_point.equals(r.top_left, tolerance))
+        self.assertTrue(right.start_point.equals(r.bottom_right, tolerance) and
+                        right.end_point.equals(r.top_right, tolerance))
+        self.assertTrue(bottom.start_point.equals(r.bottom_left, tolerance) and
+                        bottom.end_point.equals(r.bottom_right, tolerance))
+        self.assertTrue(top.start_point.equals(r.top_left, tolerance) and top.end_point.equals(r.top_right, tolerance))
+        self.assertIs(r.boundaries(), r.boundaries())
+
     def test_contains(self):
         bl = Vector(-2.0, -3.0)
         tr = Vector(1.0, 4.0)
@@ -183,6 +222,19 @@ class RectangleTests(unittest.TestCase):
         self.assertFalse(r.contains(Vector(-3.0, 0.0), tolerance))
         self.assertFalse(r.contains(Vector(0.0, -4.0), tolerance))
 
+    def test_overlaps(self):
+        r = Rectangle(Vector(-2.0, -3.0), Vector(1.0, 4.0))
+        # overlapping
+        self.assertTrue(r.overlaps(Rectangle(Vector(0.0, 0.0), Vector(5.0, 5.0)), tolerance))
+        # enclosing and enclosed
+        self.assertTrue(r.overlaps(Rectangle(Vector(-5.0, -5.0), Vector(5.0, 5.0)), tolerance))
+        self.assertTrue(r.overlaps(Rectangle(Vector(-1.0, -1.0), Vector(0.0, 0.0)), tolerance))
+        # touching
+        self.assertTrue(r.overlaps(Rectangle(Vector(1.0, 0.0), Vector(2.0, 1.0)), tolerance))
+        # separate
+        self.assertFalse(r.overlaps(Rectangle(Vector(1.5, 0.0), Vector(2.0, 1.0)), tolerance))
+        self.assertFalse(r.overlaps(Rectangle(Vector(0.0, 4.5), Vector(1.0, 5.0)), tolerance))
+
     def test_intersections_with(self):
         a_bit = Vector(0.5, 0.5)
         r = Rectangle(Vector(-1.0, -1.0), Vector(1.0, 1.0))
@@ -231,6 +283,76 @@ class RectangleTests(unittest.TestCase):
         l_top_bottom = Line(r.top_left + a_bit, r.bottom_right - a_bit)
         self.assertEqual(len(r.intersections_with(l_left_right, tolerance)), 2)
 
+    def test_intersections_with_degenerate(self):
+        # zero width or height keeps only the sides of non-zero length
+        vertical = Rectangle(Vector(1.0, 0.0), Vector(1.0, 2.0))
+        crossing = Line(Vector(0.0, 1.0), Vector(2.0, 1.0))
+        found = vertical.intersections_with(crossing, tolerance)
+        self.assertTrue(found)
+        self.assertTrue(all(p.equals(Vector(1.0, 1.0), tolerance) for p in found))
+        horizontal = Rectangle(Vector(0.0, 1.0), Vector(2.0, 1.0))
+        found = horizontal.intersections_with(Line(Vector(1.0, 0.0), Vector(1.0, 2.0)), tolerance)
+        self.assertTrue(found)
+        self.assertTrue(all(p.equals(Vector(1.0, 1.0), tolerance) for p in found))
+        point = Rectangle(Vector(1.0, 1.0), Vector(1.0, 1.0))
+        self.assertEqual(len(point.intersections_with(crossing, tolerance)), 1)
+        self.assertEqual(point.intersections_with(Line(Vector(0.0, 3.0), Vector(2.0, 3.0)), tolerance), [])
+
+
+    def test_clip(self):
+        r = Rectangle(Vector(-1.0, -1.0), Vector(1.0, 1.0))
+        self.assertEqual(r.clip(Line(Vector(-2.0, 0.0), Vector(2.0, 0.0)), 0.0), (0.25, 0.75))
+        self.assertEqual(r.clip(Line(Vector(0.0, 2.0), Vector(0.0, 0.0)), 0.0), (0.5, 1.0))
+        self.assertEqual(r.clip(Line(Vector(-0.5, -0.5), Vector(0.5, 0.5)), 0.0), (0.0, 1.0))
+        self.assertIsNone(r.clip(Line(Vector(-2.0, 2.0), Vector(2.0, 2.0)), 0.0))
+        self.assertIsNone(r.clip(Line(Vector(-3.0, 0.0), Vector(-2.0, 0.0)), 0.0))
+        self.assertIsNone(r.clip(Line(Vector(-2.0, 0.0), Vector(0.0, 3.0)), 0.0))
+        self.assertEqual(r.clip(Line(Vector(-2.0, 1.0), Vector(2.0, 1.0)), 0.0), (0.25, 0.75))
+        self.assertIsNone(r.clip(Line(Vector(-2.0, 1.0 + 1e-8), Vector(2.0, 1.0 + 1e-8)), 0.0))
+        self.assertIsNotNone(r.clip(Line(Vector(-2.0, 1.0 + 1e-8), Vector(2.0, 1.0 + 1e-8)), tolerance))
+        clipped = r.clipped(Line(Vector(-3.0, -1.0), Vector(1.0, 1.0)), 0.0)
+        self.assertTrue(clipped.start_point.equals(Vector(-1.0, 0.0), tolerance))
+        self.assertTrue(clipped.end_point.equals(Vector(1.0, 1.0), tolerance))
+        self.assertIsNone(r.clipped(Line(Vector(-2.0, 2.0), Vector(2.0, 2.0)), 0.0))
+
+    def test_clip_matches_intersections_with(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            x = rng.uniform(0.0, 10.0)
+            y = rng.uniform(0.0, 10.0)
+            r = Rectangle(Vector(x, y), Vector(x + rng.uniform(0.5, 5.0), y + rng.uniform(0.5, 5.0)))
+            line = Line(Vector(rng.uniform(0.0, 15.0), rng.uniform(0.0, 15.0)),
+                        Vector(rng.uniform(0.0, 15.0), rng.uniform(0.0, 15.0)))
+            clip = r.clip(line, tolerance)
+            direction = line.end_point - line.start_point
+            crossings = r.intersections_with(line, tolerance)
+            if clip is None:
+                self.assertEqual(crossings, [])
+                continue
+            entry = line.start_point + direction * clip[0]
+            exit = line.start_point + direction * clip[1]
+            # every boundary crossing is where the line enters or leaves
+            for p in crossings:
+                self.assertTrue((p - entry).magnitude() < 1e-6 or (p - exit).magnitude() < 1e-6)
+            # and the line crosses wherever it enters or leaves other than at its ends
+            for t, p in [(clip[0], entry), (clip[1], exit)]:
+                if 1e-6 < t < 1.0 - 1e-6:
+                    self.assertTrue(any((p - c).magnitude() < 1e-6 for c in crossings))
+
+    def test_immutable(self):
+        r = Rectangle(Vector(0.0, 0.0), Vector(2.0, 2.0))
+        self.assertTrue(r.centre().equals(Vector(1.0, 1.0), tolerance))
+        with self.assertRaises(AttributeError):
+            r.top_right = Vector(4.0, 4.0)
+        with self.assertRaises(AttributeError):
+            r._centre = None
+        with self.assertRaises(AttributeError):
+            del r.bottom_left
+        self.assertTrue(r.centre().equals(Vector(1.0, 1.0), tolerance))
+        copied = pickle.loads(pickle.dumps(r))
+        self.assertTrue(copied.equals(r, tolerance))
+        self.assertTrue(copied.centre().equals(Vector(1.0, 1.0), tolerance))
+
 
 class LineTests(unittest.TestCase):
     def test_init(self):
@@ -240,6 +362,21 @@ class LineTests(unittest.TestCase):
         self.assertEqual(ln.start_point, s)
         self.assertEqual(ln.end_point, e)
 
+    def test_bounds(self):
+        ln = Line(Vector(3.0, 4.0), Vector(1.0, 2.0))
+        self.assertTrue(ln.bounds.equals(Rectangle(Vector(1.0, 2.0), Vector(3.0, 4.0)), tolerance))
+        self.assertIs(ln.bounds, ln.bounds)
+
+    def test_unit_direction(self):
+        ln = Line(Vector(0.0, 0.0), Vector(3.0, 4.0))
+        self.assertTrue(ln.unit_direction.equals(Vector(0.6, 0.8), tolerance))
+        self.assertIs(ln.unit_direction, ln.unit_direction)
+
+    def test_slots(self):
+        for value in [Vector(0.0, 0.0), Matrix(0.0, 0.0, 0.0, 0.0), Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)),
+                      Line(Vector(0.0, 0.0), Vector(1.0, 1.0))]:
+            self.assertFalse(hasattr(value, '__dict__'))
+
     def test_add(self):
         l_before = Line(Vector(-2.0, -3.0), Vector(1.0, 4.0))
         ofs = Vector(1.0, 2.0)
@@ -300,6 +437,39 @@ class LineTests(unittest.TestCase):
         self.assertTrue(l1.intersection_with(l4, tolerance, False).equals(Vector(0.5, 0.5), tolerance))
         self.assertIsNone(l1.intersection_with(l4, tolerance, True))
 
+    def test_immutable(self):
+        l = Line(Vector(0.0, 0.0), Vector(2.0, 0.0))
+        self.assertTrue(l.unit_direction.equals(Vector(1.0, 0.0), tolerance))
+        with self.assertRaises(AttributeError):
+            l.end_point = Vector(0.0, 2.0)
+        with self.assertRaises(AttributeError):
+            l._bounds = None
+        with self.assertRaises(AttributeError):
+            del l.start_point
+        self.assertTrue(l.unit_direction.equals(Vector(1.0, 0.0), tolerance))
+        self.assertTrue(l.bounds.equals(Rectangle(Vector(0.0, 0.0), Vector(2.0, 0.0)), tolerance))
+        copied = pickle.loads(pickle.dumps(l))
+        self.assertTrue(copied.end_point.equals(Vector(2.0, 0.0), tolerance))
+
+
+class CacheStatsTests(unittest.TestCase):
+    def test_cache_stats(self):
+        reset_cache_stats()
+        r = Rectangle(Vector(-1.0, -1.0), Vector(1.0, 1.0))
+        ln = Line(Vector(-2.0, 0.5), Vector(2.0, 0.5))
+        r.intersections_with(ln, tolerance)
+        first = cache_stats()
+        self.assertEqual(first['boundaries'], {'hits': 0, 'misses': 1, 'hit_rate': 0.0})
+        r.intersections_with(ln, tolerance)
+        second = cache_stats()
+        self.assertEqual(second['boundaries'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+        # repeated queries compute no further derived values
+        for name in ['bounds', 'unit_direction']:
+            self.assertEqual(second[name]['misses'], first[name]['misses'])
+            self.assertGreater(second[name]['hits'], first[name]['hits'])
+        reset_cache_stats()
+        self.assertEqual(cache_stats()['centre'], {'hits': 0, 'misses': 0, 'hit_rate': None})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from spacial.geometry import Vector
+from spacial.grid import Grid
+
+
+class GridTests(unittest.TestCase):
+    def test_init(self):
+        g = Grid(2.0)
+        self.assertEqual(g.cell_size, 2.0)
+        self.assertEqual(len(g.cells), 0)
+
+    def test_cell_of(self):
+        g = Grid(2.0)
+        self.assertEqual(g.cell_of(Vector(0.0, 0.0)), (0, 0))
+        self.assertEqual(g.cell_of(Vector(3.0, -1.0)), (1, -1))
+
+    def test_insert(self):
+        g = Grid(2.0)
+        g.insert("a", Vector(1.0, 1.0))
+        g.insert("b", Vector(1.5, 0.5))
+        self.assertEqual(len(g.cells), 1)
+        self.assertEqual(list(g.cells[(0, 0)].keys()), ["a", "b"])
+
+    def test_remove(self):
+        g = Grid(2.0)
+        g.insert("a", Vector(1.0, 1.0))
+        g.insert("b", Vector(1.5, 0.5))
+        g.remove("a", Vector(1.0, 1.0))
+        self.assertEqual(list(g.cells[(0, 0)].keys()), ["b"])
+        g.remove("b", Vector(1.5, 0.5))
+        self.assertEqual(len(g.cells), 0)
+
+    def test_near(self):
+        g = Grid(2.0)
+        g.insert("a", Vector(1.0, 1.0))
+        g.insert("b", Vector(-1.0, 2.5))
+        g.insert("c", Vector(4.5, 1.0))
+        near = dict(g.near(Vector(0.5, 0.5)))
+        self.assertEqual(set(near.keys()), {"a", "b"})
+
+
+    def test_copy(self):
+        g = Grid(2.0)
+        g.insert("a", Vector(1.0, 1.0))
+        g.insert("b", Vector(-1.0, 2.5))
+        c = g.copy()
+        c.insert("c", Vector(1.5, 0.5))
+        c.remove("b", Vector(-1.0, 2.5))
+        g.remove("a", Vector(1.0, 1.0))
+        g.insert("d", Vector(4.5, 1.0))
+        self.assertEqual(set(dict(g.near(Vector(0.5, 0.5)))), {"b"})
+        self.assertEqual(set(dict(g.near(Vector(4.5, 1.0)))), {"d"})
+        self.assertEqual(set(dict(c.near(Vector(0.5, 0.5)))), {"a", "c"})
+        self.assertEqual(dict(c.near(Vector(8.5, 1.0))), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
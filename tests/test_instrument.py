@@ -0,0 +1,100 @@
+import unittest
+import logging
+from spacial import instrument
+from spacial.geometry import Line, Rectangle, Vector
+from spacial.instrument import LoggingSink, MemorySink, PrometheusSink
+from spacial.world import Entity, World
+
+
+tolerance: float = 1e-7
+
+
+def make_world():
+    bounds = Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0))
+    return World([Entity("I", bounds, 1), Entity("Thing", bounds, 2), Entity("Other", bounds + Vector(5.0, 5.0), 1)])
+
+
+class InstrumentTests(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+
+    def test_enable(self):
+        find = World.find
+        sink = instrument.enable()
+        self.assertTrue(instrument.enabled())
+        self.assertIsNot(World.find, find)
+        instrument.enable(sink)
+        instrument.disable()
+        self.assertFalse(instrument.enabled())
+        self.assertIs(World.find, find)
+
+    def test_memory_sink(self):
+        w = make_world()
+        line = Line(Vector(-1.0, 0.5), Vector(2.0, 0.5))
+        with instrument.instrumented() as sink:
+            self.assertEqual(w.find("I").name, "I")
+            self.assertEqual([e.name for e in w.find_near_to(w.find("I"), tolerance)], ["Thing"])
+            w.remove("Other")
+            self.assertEqual(len(Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)).intersections_with(line, tolerance)),
+                             2)
+        w.find("I")
+        metrics = sink.metrics
+        self.assertEqual(metrics['World.find'].calls, 2)
+        self.assertEqual(metrics['World.find_near_to'].calls, 1)
+        self.assertEqual(metrics['World.remove'].calls, 1)
+        self.assertEqual(metrics['Rectangle.intersections_with'].calls, 1)
+        self.assertEqual(metrics['Line.intersection_with'].calls, 4)
+        for metric in metrics.values():
+            self.assertEqual(sum(metric.buckets), metric.calls)
+            self.assertGreaterEqual(metric.seconds, 0.0)
+            self.assertIsNone(metric.allocated)
+        sink.reset()
+        self.assertEqual(sink.metrics, {})
+
+    def test_allocations(self):
+        w = make_world()
+        with instrument.instrumented(MemorySink(), True) as sink:
+            w.find_near_to(w.find("I"), tolerance)
+        self.assertIsNotNone(sink.metrics['World.find_near_to'].allocated)
+
+    def test_errors_recorded(self):
+        w = make_world()
+        with instrument.instrumented() as sink:
+            with self.assertRaises(KeyError):
+                w.remove("missing")
+        self.assertEqual(sink.metrics['World.remove'].calls, 1)
+
+    def test_buckets(self):
+        sink = MemorySink([1.0, 2.0])
+        for seconds in [0.5, 1.0, 1.5, 3.0]:
+            sink.record('f', seconds, None)
+        self.assertEqual(sink.metrics['f'].buckets, [2, 1, 1])
+
+    def test_logging_sink(self):
+        logger = logging.getLogger('spacial.test')
+        sink = LoggingSink(logger, slow=1.0)
+        with self.assertLogs(logger, logging.WARNING) as logs:
+            sink.record('f', 2.0, None)
+            sink.record('f', 0.5, None)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('slow f', logs.output[0])
+        with self.assertLogs(logger, logging.INFO) as logs:
+            sink.log()
+        self.assertIn('f: 2 calls', logs.output[0])
+
+    def test_prometheus_sink(self):
+        sink = PrometheusSink([1.0, 2.0])
+        sink.record('World.find', 0.5, 3)
+        sink.record('World.find', 1.5, 1)
+        lines = sink.text().splitlines()
+        self.assertIn('# TYPE spacial_call_seconds histogram', lines)
+        self.assertIn('spacial_call_seconds_bucket{method="World.find",le="1.0"} 1', lines)
+        self.assertIn('spacial_call_seconds_bucket{method="World.find",le="2.0"} 2', lines)
+        self.assertIn('spacial_call_seconds_bucket{method="World.find",le="+Inf"} 2', lines)
+        self.assertIn('spacial_call_seconds_sum{method="World.find"} 2.0', lines)
+        self.assertIn('spacial_call_seconds_count{method="World.find"} 2', lines)
+        self.assertIn('spacial_allocated_blocks_total{method="World.find"} 4', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
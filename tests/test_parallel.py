@@ -0,0 +1,86 @@
+import unittest
+import random
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+from spacial.parallel import QueryPool
+
+
+tolerance: float = 1e-7
+
+
+class ParallelTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.entities = []
+        for i in range(500):
+            x = rng.randint(0, 20) * 0.5
+            y = rng.randint(0, 20) * 0.5
+            self.entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), i % 3))
+        self.world = World(self.entities)
+        self.queries = [('find_near_to', e, 0.3) for e in self.entities[::5]]
+        self.queries += [('find', "7"), ('find', "missing"), ('query_point', Vector(5.0, 5.0), tolerance),
+                         ('query_rect', Rectangle(Vector(1.0, 1.0), Vector(2.0, 3.0)), tolerance),
+                         ('nearest', Vector(3.0, 3.0), 5), ('within_radius', Vector(3.0, 3.0), 1.5)]
+
+    def tearDown(self):
+        self.world.close()
+
+    def expected(self):
+        return [getattr(self.world, query[0])(*query[1:]) for query in self.queries]
+
+    def test_batch_query(self):
+        self.assertEqual(self.world.batch_query(self.queries), self.expected())
+        self.assertEqual(self.world.batch_query(self.queries, workers=2), self.expected())
+
+    def test_batch_query_pool_kept(self):
+        self.assertEqual(self.world.batch_query(self.queries, workers=2), self.expected())
+        pool = self.world._pool
+        self.assertEqual(self.world.batch_query(self.queries, workers=2), self.expected())
+        self.assertIs(self.world._pool, pool)
+        # a change closes the pool so that a later batch sees it
+        self.world.remove("7")
+        self.assertIsNone(self.world._pool)
+        self.assertEqual(self.world.batch_query(self.queries, workers=2), self.expected())
+        self.assertEqual(self.world.batch_query([('find', "7")], workers=2), [None])
+        pool = self.world._pool
+        self.world.batch_query(self.queries, workers=3)
+        self.assertIsNot(self.world._pool, pool)
+        self.assertEqual(self.world._pool.workers, 3)
+        self.world.close()
+        self.assertIsNone(self.world._pool)
+
+    def test_batch_query_resolution(self):
+        rng = random.Random(2)
+        w = World([Entity(e.name, e.bounds + Vector(rng.uniform(-0.2, 0.2), rng.uniform(-0.2, 0.2)), e.layer)
+                   for e in self.entities], resolution=0.5)
+        queries = [('find_near_to', e, 0.0) for e in self.entities[::5]] + [('query_point', Vector(5.1, 4.9), 0.0)]
+        expected = [getattr(w, query[0])(*query[1:]) for query in queries]
+        self.assertTrue(any(expected))
+        self.assertEqual(w.batch_query(queries, workers=2), expected)
+        w.close()
+
+    def test_batch_query_invalid(self):
+        with self.assertRaises(ValueError):
+            self.world.batch_query([('remove', "7")])
+        self.assertIsNotNone(self.world.find("7"))
+
+    def test_join(self):
+        other = World([Entity(e.name, e.bounds + Vector(0.25, 0.0), e.layer) for e in self.entities[::3]])
+        for predicate, t in [('overlaps', tolerance), ('near', 0.3)]:
+            expected = list(self.world.join(other, predicate, t))
+            self.assertTrue(expected)
+            self.assertEqual(list(self.world.join(other, predicate, t, workers=2)), expected)
+        other.close()
+        with QueryPool(other, 2) as pool:
+            self.assertEqual(list(pool.join(self.entities, 'overlaps', tolerance, chunk_size=7)),
+                             list(World(self.entities).join(other, 'overlaps', tolerance)))
+
+    def test_query_pool(self):
+        with QueryPool(self.world, 2) as pool:
+            self.assertEqual(pool.query(self.queries), self.expected())
+            self.assertEqual(pool.query(self.queries, chunk_size=1), self.expected())
+            self.assertEqual(pool.query([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
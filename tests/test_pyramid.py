@@ -0,0 +1,111 @@
+import unittest
+import random
+from spacial.geometry import Rectangle, Vector
+from spacial.pyramid import Pyramid
+
+
+tolerance: float = 1e-7
+
+
+def random_entries(count: int, seed: int):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        x = rng.uniform(0.0, 16.0)
+        y = rng.uniform(0.0, 8.0)
+        entries.append((i, Rectangle(Vector(x, y), Vector(x + rng.uniform(0.1, 1.0), y + rng.uniform(0.1, 1.0)))))
+    return entries
+
+
+class PyramidTests(unittest.TestCase):
+    # aggregates of the entries at the zoom level computed by grouping them by cell
+    def expected(self, p: Pyramid, entries: list, zoom: int):
+        size = p.side / 2 ** zoom
+        n = 2 ** zoom
+        groups = {}
+        for key, bounds in entries:
+            c = bounds.centre()
+            cell = (min(max(int((c.x - p.origin.x) // size), 0), n - 1),
+                    min(max(int((c.y - p.origin.y) // size), 0), n - 1))
+            groups.setdefault(cell, []).append(bounds)
+        return groups
+
+    def check(self, p: Pyramid, entries: list):
+        self.assertEqual(len(p), len(entries))
+        everywhere = Rectangle(Vector(-100.0, -100.0), Vector(100.0, 100.0))
+        for zoom in range(p.levels):
+            groups = self.expected(p, entries, zoom)
+            aggregates = p.query(everywhere, zoom)
+            self.assertEqual([a.cell for a in aggregates], sorted(groups))
+            for a in aggregates:
+                group = groups[a.cell]
+                self.assertEqual(a.zoom, zoom)
+                self.assertEqual(a.count, len(group))
+                self.assertTrue(a.bounds.equals(Rectangle(
+                    Vector(min(b.bottom_left.x for b in group), min(b.bottom_left.y for b in group)),
+                    Vector(max(b.top_right.x for b in group), max(b.top_right.y for b in group))), tolerance))
+                centroid = Vector(sum(b.centre().x for b in group) / len(group),
+                                  sum(b.centre().y for b in group) / len(group))
+                self.assertTrue(a.centroid().equals(centroid, tolerance))
+
+    def test_init(self):
+        entries = random_entries(300, 1)
+        p = Pyramid(Rectangle(Vector(0.0, 0.0), Vector(17.0, 9.0)), 6, entries)
+        self.assertEqual(p.side, 17.0)
+        self.check(p, entries)
+        self.assertEqual(p.query(Rectangle(Vector(-100.0, -100.0), Vector(100.0, 100.0)), 0)[0].count, 300)
+
+    def test_init_empty(self):
+        p = Pyramid(Rectangle(Vector(0.0, 0.0), Vector(0.0, 0.0)), 4, [])
+        self.assertEqual(p.side, 1.0)
+        self.assertEqual(p.query(Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 3), [])
+
+    def test_query(self):
+        entries = random_entries(300, 2)
+        p = Pyramid(Rectangle(Vector(0.0, 0.0), Vector(16.0, 8.0)), 5, entries)
+        rect = Rectangle(Vector(3.0, 2.0), Vector(7.5, 5.0))
+        for zoom in range(5):
+            found = p.query(rect, zoom)
+            expected = sorted(cell for cell in self.expected(p, entries, zoom)
+                              if p.region(zoom, cell).overlaps(rect, 0.0))
+            self.assertEqual([a.cell for a in found], expected)
+        with self.assertRaises(ValueError):
+            p.query(rect, 5)
+        with self.assertRaises(ValueError):
+            p.query(rect, -1)
+
+    def test_region(self):
+        p = Pyramid(Rectangle(Vector(1.0, 2.0), Vector(9.0, 4.0)), 4, [])
+        self.assertTrue(p.region(0, (0, 0)).equals(Rectangle(Vector(1.0, 2.0), Vector(9.0, 10.0)), tolerance))
+        self.assertTrue(p.region(2, (1, 3)).equals(Rectangle(Vector(3.0, 8.0), Vector(5.0, 10.0)), tolerance))
+
+    def test_covers(self):
+        p = Pyramid(Rectangle(Vector(1.0, 2.0), Vector(9.0, 4.0)), 4, [])
+        self.assertTrue(p.covers(Vector(1.0, 2.0)))
+        self.assertTrue(p.covers(Vector(9.0, 10.0)))
+        self.assertFalse(p.covers(Vector(9.5, 3.0)))
+        self.assertFalse(p.covers(Vector(5.0, 1.0)))
+
+    def test_insert_remove(self):
+        entries = random_entries(300, 3)
+        p = Pyramid(Rectangle(Vector(0.0, 0.0), Vector(16.0, 8.0)), 6, entries[:200])
+        for key, bounds in entries[200:]:
+            p.insert(key, bounds)
+        # outside the square, so counted in an edge cell
+        outside = (300, Rectangle(Vector(30.0, -5.0), Vector(31.0, -4.0)))
+        p.insert(*outside)
+        remaining = dict(entries + [outside])
+        for key, _ in entries[::3]:
+            p.remove(key)
+            del remaining[key]
+        moved = Rectangle(Vector(1.0, 1.0), Vector(2.0, 2.0))
+        p.insert(1, moved)
+        remaining[1] = moved
+        self.check(p, list(remaining.items()))
+        for key in list(remaining):
+            p.remove(key)
+        self.assertEqual(p.cells, [{} for _ in range(6)])
+
+
+if __name__ == '__main__':
+    unittest.main()
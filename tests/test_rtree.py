@@ -0,0 +1,132 @@
+import unittest
+import random
+from array import array
+from spacial.geometry import Rectangle, Vector
+from spacial.rtree import RTree, bounding
+
+
+tolerance: float = 1e-7
+
+
+def random_entries(count: int, seed: int):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        x = rng.uniform(0.0, 100.0)
+        y = rng.uniform(0.0, 100.0)
+        entries.append((i, Rectangle(Vector(x, y), Vector(x + rng.uniform(0.0, 5.0), y + rng.uniform(0.0, 5.0)))))
+    return entries
+
+
+def check_node(test: unittest.TestCase, tree: RTree, node, capacity: int):
+    test.assertLessEqual(len(node.children), capacity)
+    for b in node.child_bounds():
+        test.assertTrue(node.bounds.overlaps(b, 0.0))
+        test.assertTrue(node.bounds.contains(b.bottom_left, 0.0) and node.bounds.contains(b.top_right, 0.0))
+    if node.leaf:
+        for key in node.children:
+            test.assertIs(tree._leaves[key], node)
+    else:
+        for child in node.children:
+            test.assertIs(tree._parents[child], node)
+            check_node(test, tree, child, capacity)
+
+
+class RTreeTests(unittest.TestCase):
+    def test_bounding(self):
+        b = bounding([Rectangle(Vector(0.0, 1.0), Vector(2.0, 3.0)), Rectangle(Vector(-1.0, 2.0), Vector(1.0, 5.0))])
+        self.assertTrue(b.equals(Rectangle(Vector(-1.0, 1.0), Vector(2.0, 5.0)), tolerance))
+        self.assertIsNone(bounding([]))
+
+    def test_init(self):
+        entries = random_entries(1000, 1)
+        t = RTree(entries, 8)
+        self.assertEqual(len(t), 1000)
+        self.assertIn(5, t)
+        check_node(self, t, t.root, 8)
+
+    def test_init_empty(self):
+        t = RTree([])
+        self.assertEqual(len(t), 0)
+        self.assertEqual(t.search(lambda b: True), [])
+
+    def test_packed(self):
+        entries = random_entries(1000, 9)
+        bounds = array('d')
+        for key, b in entries:
+            bounds.extend((b.bottom_left.x, b.bottom_left.y, b.top_right.x, b.top_right.y))
+        t = RTree.packed([key for key, b in entries], bounds, 8)
+        u = RTree(entries, 8)
+        self.assertEqual(len(t), 1000)
+        check_node(self, t, t.root, 8)
+        window = Rectangle(Vector(20.0, 30.0), Vector(40.0, 45.0))
+        self.assertEqual(sorted(t.search(lambda b: b.overlaps(window, tolerance))),
+                         sorted(u.search(lambda b: b.overlaps(window, tolerance))))
+        self.assertEqual(len(RTree.packed([], array('d'))), 0)
+
+    def test_search(self):
+        entries = random_entries(1000, 2)
+        t = RTree(entries, 8)
+        window = Rectangle(Vector(20.0, 30.0), Vector(40.0, 45.0))
+        expected = sorted(key for key, b in entries if b.overlaps(window, tolerance))
+        self.assertEqual(sorted(t.search(lambda b: b.overlaps(window, tolerance))), expected)
+
+    def test_insert(self):
+        entries = random_entries(500, 3)
+        t = RTree(entries[:10], 4)
+        for key, b in entries[10:]:
+            t.insert(key, b)
+        self.assertEqual(len(t), 500)
+        check_node(self, t, t.root, 4)
+        point = Vector(50.0, 50.0)
+        expected = sorted(key for key, b in entries if b.contains(point, tolerance))
+        self.assertEqual(sorted(t.search(lambda b: b.contains(point, tolerance))), expected)
+
+    def test_remove(self):
+        entries = random_entries(500, 4)
+        t = RTree(entries, 4)
+        for key, b in entries[::2]:
+            t.remove(key)
+        self.assertEqual(len(t), 250)
+        self.assertNotIn(0, t)
+        check_node(self, t, t.root, 4)
+        self.assertEqual(sorted(t.search(lambda b: True)), [key for key, b in entries[1::2]])
+        for key, b in entries[1::2]:
+            t.remove(key)
+        self.assertEqual(t.search(lambda b: True), [])
+        t.insert("a", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)))
+        self.assertEqual(t.search(lambda b: True), ["a"])
+
+    def test_copy(self):
+        entries = random_entries(500, 6)
+        t = RTree(entries[:300], 4)
+        c = t.copy()
+        self.assertIs(c.root, t.root)
+        for key, b in entries[300:]:
+            c.insert(key, b)
+        for key, b in entries[:100]:
+            t.remove(key)
+        c2 = c.copy()
+        for key, b in entries[::3]:
+            c2.remove(key)
+        for tree, expected in [(t, entries[100:300]), (c, entries), (c2, [e for e in entries if e[0] % 3])]:
+            check_node(self, tree, tree.root, 4)
+            self.assertEqual(len(tree), len(expected))
+            self.assertEqual(sorted(tree.search(lambda b: True)), sorted(key for key, b in expected))
+            point = Vector(50.0, 50.0)
+            self.assertEqual(sorted(tree.search(lambda b: b.contains(point, tolerance))),
+                             sorted(key for key, b in expected if b.contains(point, tolerance)))
+
+    def test_nearest(self):
+        entries = random_entries(500, 5)
+        t = RTree(entries, 4)
+        point = Vector(30.0, 60.0)
+        distance = lambda key, b: (b.centre() - point).magnitude()
+        found = list(t.nearest(point, distance))
+        self.assertEqual(len(found), 500)
+        self.assertEqual([d for d, key in found], sorted(distance(key, b) for key, b in entries))
+        self.assertEqual(list(RTree([]).nearest(point, distance)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
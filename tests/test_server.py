@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+from spacial.server import WorldServer, serve_socket
+
+
+tolerance: float = 1e-7
+
+
+def make_world():
+    bounds = Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0))
+    return World([Entity("I", bounds, 1), Entity("Thing", bounds, 2), Entity("Other", bounds + Vector(5.0, 5.0), 1)])
+
+
+class WorldServerTests(unittest.TestCase):
+    def test_apply(self):
+        server = WorldServer(make_world())
+        self.assertEqual(server.apply({'id': 1, 'op': 'find', 'name': 'I'}),
+                         {'id': 1, 'result': {'name': 'I', 'bounds': [0.0, 0.0, 1.0, 1.0], 'layer': 1}})
+        self.assertEqual(server.apply({'id': 2, 'op': 'find', 'name': 'missing'}), {'id': 2, 'result': None})
+        self.assertEqual([e['name'] for e in server.apply({'op': 'find_near_to', 'name': 'I',
+                                                           'tolerance': tolerance})['result']], ['Thing'])
+        self.assertEqual([e['name'] for e in server.apply({'op': 'find_near_to', 'bounds': [5.0, 5.0, 6.0, 6.0],
+                                                           'tolerance': tolerance})['result']], ['Other'])
+        self.assertEqual(server.apply({'op': 'find_near_to', 'name': 'Thing', 'tolerance': tolerance,
+                                       'layers': [2]})['result'], [])
+        self.assertEqual(server.apply({'id': 3, 'op': 'remove', 'name': 'I'}), {'id': 3, 'result': None})
+        self.assertIn('error', server.apply({'op': 'remove', 'name': 'I'}))
+        self.assertIn('error', server.apply({'op': 'find_near_to', 'name': 'I', 'tolerance': tolerance}))
+        self.assertIn('error', server.apply({'op': 'explode'}))
+
+    def test_submit(self):
+        async def run():
+            async with WorldServer(make_world(), max_batch=8) as server:
+                requests = [{'id': i, 'op': 'find', 'name': 'Thing'} for i in range(20)]
+                requests.insert(10, {'id': 'r', 'op': 'remove', 'name': 'Thing'})
+                responses = await asyncio.gather(*[server.submit(r) for r in requests])
+                return server, responses
+
+        server, responses = asyncio.run(run())
+        # mutations apply in arrival order between the queries
+        self.assertEqual([r['result'] is not None for r in responses if r['id'] != 'r'], [True] * 10 + [False] * 10)
+        self.assertEqual(server.requests, 21)
+        self.assertLess(server.batches, 21)
+        stats = server.stats()
+        self.assertLessEqual(stats['p50'], stats['p99'])
+        self.assertLessEqual(stats['p99'], stats['max'])
+
+    def test_submit_failures(self):
+        def fail(name):
+            raise RuntimeError('broken')
+
+        async def run():
+            async with WorldServer(make_world()) as server:
+                not_object = await server.submit([1, 2])
+                server.world.find = fail
+                failed = await server.submit({'id': 1, 'op': 'find', 'name': 'I'})
+                del server.world.find
+                # the server keeps answering after a request fails unexpectedly
+                found = await server.submit({'id': 2, 'op': 'find', 'name': 'I'})
+                return not_object, failed, found
+
+        not_object, failed, found = asyncio.run(run())
+        self.assertEqual(not_object, {'id': None, 'error': 'ValueError: request must be a JSON object'})
+        self.assertEqual(failed, {'id': 1, 'error': 'RuntimeError: broken'})
+        self.assertEqual(found['result']['name'], 'I')
+
+    def test_serve_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), 'world.sock')
+
+        async def run():
+            task = asyncio.get_running_loop().create_task(serve_socket(WorldServer(make_world()), path))
+            while not os.path.exists(path):
+                await asyncio.sleep(0.01)
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b'{"id": 1, "op": "find", "name": "Other"}\n\nnot json\n[1, 2]\n{"id": 2, "op": "stats"}\n')
+            writer.write_eof()
+            responses = [json.loads(line) for line in (await reader.read()).splitlines()]
+            writer.close()
+            task.cancel()
+            return responses
+
+        responses = sorted(asyncio.run(run()), key=lambda r: str(r['id']))
+        self.assertEqual([r['id'] for r in responses], [1, 2, None, None])
+        self.assertEqual(responses[0]['result']['name'], 'Other')
+        self.assertIn('p99', responses[1]['result'])
+        self.assertIn('error', responses[2])
+        self.assertIn('error', responses[3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import os
+import random
+import tempfile
+from spacial.geometry import Rectangle, Vector
+from spacial.world import Entity, World
+from spacial.snapshot import SnapshotEntities
+
+
+tolerance: float = 1e-7
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.entities = []
+        for i in range(200):
+            x = rng.uniform(0.0, 20.0)
+            y = rng.uniform(0.0, 20.0)
+            self.entities.append(Entity("e%d" % rng.randrange(1000), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)),
+                                        rng.randrange(-3, 3)))
+        self.entities.append(Entity("ünïcode", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 0))
+        self.entities.append(Entity("", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 0))
+        self.world = World(self.entities)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.world.save(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_load(self):
+        for mmap in [True, False]:
+            w = World.load(self.path, mmap)
+            self.assertIsInstance(w.entities, SnapshotEntities)
+            self.assertIsNone(w.resolution)
+            self.assertIsNone(w.hash_quantum)
+            self.assertEqual(list(w.entities), list(self.world.entities))
+            self.assertTrue(w.equals(self.world, tolerance))
+            self.assertTrue(self.world.equals(w, tolerance))
+
+    def test_find(self):
+        w = World.load(self.path)
+        for name, entity in self.world.entities.items():
+            self.assertTrue(w.find(name).equals(entity, tolerance))
+            self.assertIs(w.find(name), w.find(name))
+        self.assertIsNone(w.find("missing"))
+        self.assertIsNone(w.find("e"))
+        self.assertNotIn("missing", w.entities)
+        # keys that are not names are missing, as for a dict
+        self.assertIsNone(w.find(3))
+        self.assertNotIn(3, w.entities)
+        with self.assertRaises(KeyError):
+            w.entities[3]
+
+    def test_queries(self):
+        w = World.load(self.path)
+        target = self.entities[5]
+        self.assertEqual([e.name for e in w.find_near_to(target, 0.5)],
+                         [e.name for e in self.world.find_near_to(target, 0.5)])
+        window = Rectangle(Vector(5.0, 5.0), Vector(8.0, 9.0))
+        self.assertEqual([e.name for e in w.query_rect(window, tolerance)],
+                         [e.name for e in self.world.query_rect(window, tolerance)])
+
+    def test_mutate(self):
+        w = World.load(self.path)
+        name = self.entities[7].name
+        w.remove(name)
+        self.assertIsInstance(w.entities, dict)
+        self.assertIsNone(w.find(name))
+        self.assertEqual(len(w.entities), len(self.world.entities) - 1)
+
+    def test_settings(self):
+        w = World(self.entities, hash_quantum=0.01, resolution=0.5)
+        w.save(self.path)
+        loaded = World.load(self.path)
+        self.assertEqual(loaded.resolution, 0.5)
+        self.assertEqual(loaded.hash_quantum, 0.01)
+        self.assertEqual(loaded.content_hash(), w.content_hash())
+        self.assertTrue(loaded.equals(w, 0.0))
+        target = Entity("probe", self.entities[5].bounds + Vector(0.1, -0.1), 0)
+        self.assertEqual([e.name for e in loaded.find_near_to(target, 0.0)], [self.entities[5].name])
+        self.assertEqual([e.name for e in loaded.query_point(Vector(5.1, 4.9), 0.0)],
+                         [e.name for e in w.query_point(Vector(5.1, 4.9), 0.0)])
+        name = self.entities[7].name
+        loaded.remove(name)
+        w.remove(name)
+        self.assertEqual(loaded.content_hash(), w.content_hash())
+        self.assertTrue(loaded.equals(w, 0.0))
+
+    def test_empty(self):
+        World([]).save(self.path)
+        w = World.load(self.path)
+        self.assertEqual(len(w.entities), 0)
+        self.assertIsNone(w.find("I"))
+
+    def test_not_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            World.load(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import random
+from spacial.geometry import Line, Rectangle, Vector
+from spacial.sweep import overlapping_pairs, find_intersections
+
+
+tolerance: float = 1e-7
+
+
+class SweepTests(unittest.TestCase):
+    def test_overlapping_pairs(self):
+        rng = random.Random(1)
+        rectangles = []
+        for _ in range(300):
+            x = rng.uniform(0.0, 100.0)
+            y = rng.uniform(0.0, 100.0)
+            rectangles.append(Rectangle(Vector(x, y), Vector(x + rng.uniform(0.0, 8.0), y + rng.uniform(0.0, 8.0))))
+        # touching rectangles
+        rectangles.append(Rectangle(Vector(200.0, 0.0), Vector(201.0, 1.0)))
+        rectangles.append(Rectangle(Vector(201.0, 1.0), Vector(202.0, 2.0)))
+        expected = [(i, j)
+                    for i in range(len(rectangles)) for j in range(i + 1, len(rectangles))
+                    if rectangles[i].overlaps(rectangles[j], tolerance)]
+        self.assertIn((300, 301), expected)
+        self.assertEqual(overlapping_pairs(rectangles, tolerance), expected)
+
+    def test_find_intersections(self):
+        rng = random.Random(2)
+        lines = []
+        for _ in range(200):
+            start = Vector(rng.uniform(0.0, 100.0), rng.uniform(0.0, 100.0))
+            lines.append(Line(start, start + Vector(rng.uniform(-10.0, 10.0), rng.uniform(-10.0, 10.0))))
+        # lines meeting at an end-point and a vertical line
+        lines.append(Line(Vector(0.0, 0.0), Vector(1.0, 1.0)))
+        lines.append(Line(Vector(1.0, 1.0), Vector(2.0, 0.0)))
+        lines.append(Line(Vector(0.5, -1.0), Vector(0.5, 2.0)))
+        expected = find_intersections(lines, tolerance, True)
+        self.assertGreater(len(expected), 0)
+        found = find_intersections(lines, tolerance)
+        self.assertEqual([(i, j) for i, j, p in found], [(i, j) for i, j, p in expected])
+        for (_, _, p1), (_, _, p2) in zip(found, expected):
+            self.assertTrue(p1.equals(p2, tolerance))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import random
+from spacial import versioned
+from spacial.versioned import VersionedDict
+
+
+class VersionedDictTests(unittest.TestCase):
+    def test_init(self):
+        d = VersionedDict([("a", 1), ("b", 2), ("a", 3)])
+        self.assertEqual(len(d), 2)
+        self.assertEqual(list(d), ["a", "b"])
+        self.assertEqual(d["a"], 3)
+        self.assertEqual(d.get("c"), None)
+        self.assertEqual(d.get("c", 4), 4)
+        self.assertIn("b", d)
+        self.assertNotIn("c", d)
+        with self.assertRaises(KeyError):
+            d["c"]
+
+    def test_matches_dict(self):
+        rng = random.Random(1)
+        d = VersionedDict()
+        expected = {}
+        for _ in range(20000):
+            key = str(rng.randint(0, 3000))
+            if rng.random() < 0.4 and key in expected:
+                del d[key]
+                del expected[key]
+            else:
+                d[key] = expected[key] = rng.random()
+        self.assertEqual(len(d), len(expected))
+        self.assertEqual(list(d), list(expected))
+        self.assertEqual(d.items(), list(expected.items()))
+        self.assertEqual(d.values(), list(expected.values()))
+        self.assertEqual(d, expected)
+        with self.assertRaises(KeyError):
+            del d["missing"]
+
+    def test_copy(self):
+        d = VersionedDict((str(i), i) for i in range(3 * versioned.chunk_size))
+        c = d.copy()
+        d["0"] = -1
+        del d["5"]
+        d["new"] = 7
+        self.assertEqual(c["0"], 0)
+        self.assertEqual(c["5"], 5)
+        self.assertNotIn("new", c)
+        self.assertEqual(len(c), 3 * versioned.chunk_size)
+        self.assertEqual(list(c), [str(i) for i in range(3 * versioned.chunk_size)])
+        self.assertEqual(d["0"], -1)
+        self.assertNotIn("5", d)
+        self.assertEqual(list(d)[-1], "new")
+        # copies may change independently of each other
+        c2 = c.copy()
+        c["1"] = -2
+        del c2["2"]
+        self.assertEqual(d["1"], 1)
+        self.assertEqual(c2["1"], 1)
+        self.assertIn("2", c)
+        self.assertEqual(len(c2), 3 * versioned.chunk_size - 1)
+
+    def test_copies_share_storage(self):
+        d = VersionedDict((str(i), i) for i in range(3 * versioned.chunk_size))
+        c = d.copy()
+        d["0"] = -1
+        self.assertIsNot(d._chunks[0], c._chunks[0])
+        self.assertIs(d._chunks[1], c._chunks[1])
+        self.assertIs(d._chunks[2], c._chunks[2])
+        self.assertEqual(sum(a is not b for a, b in zip(d._shards, c._shards)), 1)
+
+    def test_compact(self):
+        d = VersionedDict((str(i), i) for i in range(4 * versioned.chunk_size))
+        c = d.copy()
+        for i in range(0, 4 * versioned.chunk_size, 4):
+            d[str(i)] = -i
+        for i in range(1, 4 * versioned.chunk_size, 4):
+            del d[str(i)]
+        for i in range(2, 4 * versioned.chunk_size, 4):
+            del d[str(i)]
+        self.assertLessEqual(d._size, 2 * len(d) + versioned.chunk_size)
+        self.assertEqual(list(d), [str(i) for i in range(4 * versioned.chunk_size) if i % 4 in (0, 3)])
+        self.assertEqual(d["4"], -4)
+        self.assertEqual(len(c), 4 * versioned.chunk_size)
+        self.assertEqual(c["4"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
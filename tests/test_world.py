@@ -1,6 +1,9 @@
 import unittest
-from spacial.geometry import Rectangle, Vector
+import random
+import threading
+from spacial.geometry import Line, Rectangle, Vector
 from spacial.world import Entity, World
+from spacial import fixed
 
 
 tolerance: float = 1e-7
@@ -61,6 +64,36 @@ class WorldTest(unittest.TestCase):
 
         self.assertTrue(w1.equals(w2, tolerance))
         self.assertFalse(w1.equals(w3, tolerance))
+        self.assertFalse(w3.equals(w1, tolerance))
+        self.assertFalse(World([e2]).equals(World([e3]), tolerance))
+        self.assertFalse(World([e1]).equals(World([e3]), tolerance))
+
+    def test_diff(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e3 = Entity("Other", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        w1 = World([e1, e2])
+        w2 = World([e1, e2, e3])
+        w2.move("Thing", Vector(1.0, 0.0))
+        self.assertEqual(w1.diff(w2, tolerance), (["Other"], [], ["Thing"]))
+        self.assertEqual(w2.diff(w1, tolerance), ([], ["Other"], ["Thing"]))
+        self.assertEqual(w1.diff(World([e1, e2]), tolerance), ([], [], []))
+
+    def test_content_hash(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        self.assertIsNone(World([e1]).content_hash())
+        w1 = World([e1, e2], 1e-3)
+        w2 = World([e2, e1], 1e-3)
+        self.assertEqual(w1.content_hash(), w2.content_hash())
+        w2.move("Thing", Vector(1.0, 0.0))
+        self.assertNotEqual(w1.content_hash(), w2.content_hash())
+        w2.move("Thing", Vector(-1.0, 0.0))
+        self.assertEqual(w1.content_hash(), w2.content_hash())
+        w2.remove("Thing")
+        self.assertEqual(w2.content_hash(), World([e1], 1e-3).content_hash())
+        w2.add(e2)
+        self.assertEqual(w1.content_hash(), w2.content_hash())
 
     def test_find(self):
         name1 = "I"
@@ -92,6 +125,527 @@ class WorldTest(unittest.TestCase):
         for n in near:
             self.assertTrue(n.equals(e2, tolerance))
 
+    def test_find_near_to_matches_scan(self):
+        rng = random.Random(1)
+        entities = []
+        for i in range(500):
+            x = rng.randint(0, 20) * 0.5
+            y = rng.randint(0, 20) * 0.5
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), 0))
+        w = World(entities)
+        for name in [str(i) for i in range(0, 500, 7)]:
+            w.remove(name)
+        for t in [1e-7, 0.25, 0.5, 3.0]:
+            for e in entities[::13]:
+                expected = [entity
+                            for name, entity in w.entities.items()
+                            if entity.bounds.centre().equals(e.bounds.centre(), t) and name != e.name]
+                self.assertEqual(w.find_near_to(e, t), expected)
+
+    def test_find_near_to_after_replace(self):
+        bounds = Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0))
+        e1 = Entity("I", bounds, 1)
+        e2 = Entity("Thing", bounds, 1)
+        e3 = Entity("I", Rectangle(Vector(5.0, 5.0), Vector(6.0, 6.0)), 1)
+        w = World([e1, e2, e3])
+        self.assertEqual(w.find_near_to(e2, tolerance), [])
+        self.assertEqual(w.find_near_to(e1, tolerance), [e2])
+        self.assertEqual(w.find_near_to(e2, 0.0), [])
+
+    def test_resolution(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.01, -0.02), Vector(1.02, 0.97)), 2)
+        e3 = Entity("Other", Rectangle(Vector(0.2, 0.0), Vector(1.2, 1.0)), 1)
+        w = World([e1, e2, e3], resolution=0.1)
+        self.assertTrue(w.find("Thing").bounds.equals(e1.bounds, tolerance))
+        self.assertEqual(w.find("Thing").layer, 2)
+        self.assertEqual(w.find_near_to(e1, 0.0), [w.find("Thing")])
+        self.assertEqual(w.find_near_to(e1, 0.0, [1]), [])
+        self.assertEqual(w.find_near_to(e3, 0.0), [])
+        self.assertEqual(len(w.find_near_to(e1, 0.5)), 2)
+        self.assertEqual(w.query_point(Vector(1.04, 0.5), 0.0), [w.find("I"), w.find("Thing"), w.find("Other")])
+        self.assertEqual(w.query_point(Vector(1.16, 0.5), 0.0), [w.find("Other")])
+        self.assertEqual(w.query_point(Vector(1.26, 0.5), 0.0), [])
+        w.move("Thing", Vector(0.2, 0.0))
+        self.assertEqual(w.find_near_to(e3, 0.0), [w.find("Thing")])
+        self.assertEqual(w.find_near_to(e1, 0.0), [])
+        w.remove("Thing")
+        self.assertEqual(w.find_near_to(e3, 0.0), [])
+        self.assertTrue(w.equals(World([e3, e1], resolution=0.1), 0.0))
+        self.assertFalse(w.equals(World([e3, Entity("I", e1.bounds, 2)], resolution=0.1), 0.0))
+        # tolerances not below the resolution compare the snapped bounds within the tolerance
+        shifted = World([e3, Entity("I", e1.bounds + Vector(0.1, 0.0), 1)], resolution=0.1)
+        self.assertFalse(w.equals(shifted, 0.0))
+        self.assertTrue(w.equals(shifted, 0.15))
+
+    def test_resolution_matches_scan(self):
+        rng = random.Random(10)
+        entities = []
+        for i in range(300):
+            x = rng.uniform(0.0, 5.0)
+            y = rng.uniform(0.0, 5.0)
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + rng.uniform(0.1, 1.0), y + 0.5)), 0))
+        w = World(entities, resolution=0.25)
+        for e in entities[::4]:
+            w.remove(e.name)
+        for e in entities[1::8]:
+            centre = w.find(e.name).bounds.centre()
+            self.assertEqual(w.find_near_to(e, 0.0),
+                             [other for other in w.entities.values()
+                              if other.bounds.centre().equals(centre, tolerance) and other.name != e.name])
+        # tolerances up to the resolution match the scan of the snapped bounds, including those of half of it or
+        # more whose centres differ in key
+        plain = World(list(w.entities.values()))
+        for e in list(w.entities.values())[::5]:
+            for t in [0.05, 0.1, 0.125, 0.2, 0.24]:
+                self.assertEqual([other.name for other in w.find_near_to(e, t)],
+                                 [other.name for other in plain.find_near_to(e, t)])
+        # moves keep the snapped size whatever the offset
+        w = World([Entity("m", Rectangle(Vector(0.5, 0.5), Vector(1.5, 1.5)), 0)], resolution=1.0)
+        for _ in range(3):
+            w.move("m", Vector(0.5, 0.5))
+            self.assertEqual(w._corner_map()["m"][2] - w._corner_map()["m"][0], 1)
+        a = Entity("a", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 0)
+        b = Entity("b", Rectangle(Vector(0.0, 0.0), Vector(2.0, 1.0)), 0)
+        self.assertEqual([e.name for e in World([a, b], resolution=1.0).find_near_to(a, 0.75)], ["b"])
+        for point in [Vector(2.5, 2.5), Vector(1.0, 3.75), Vector(4.1, 0.3)]:
+            snapped = Vector(round(point.x / 0.25) * 0.25, round(point.y / 0.25) * 0.25)
+            self.assertEqual(w.query_point(point, 0.0),
+                             [e for e in w.entities.values() if e.bounds.contains(snapped, tolerance)])
+
+    def test_query_rect(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(2.0, 2.0), Vector(3.0, 3.0)), 1)
+        e3 = Entity("Other", Rectangle(Vector(-1.0, 0.5), Vector(0.0, 4.0)), 1)
+        w = World([e1, e2, e3])
+        self.assertEqual(w.query_rect(Rectangle(Vector(0.5, 0.5), Vector(2.0, 2.0)), tolerance), [e1, e2])
+        self.assertEqual(w.query_rect(Rectangle(Vector(5.0, 5.0), Vector(6.0, 6.0)), tolerance), [])
+        w.remove("I")
+        self.assertEqual(w.query_rect(Rectangle(Vector(0.5, 0.5), Vector(2.0, 2.0)), tolerance), [e2])
+        w.remove("Thing")
+        w.remove("Other")
+        self.assertEqual(w.query_rect(Rectangle(Vector(0.5, 0.5), Vector(2.0, 2.0)), tolerance), [])
+
+    def test_query_point(self):
+        rng = random.Random(2)
+        entities = []
+        for i in range(300):
+            x = rng.uniform(0.0, 10.0)
+            y = rng.uniform(0.0, 10.0)
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), 0))
+        w = World(entities)
+        point = Vector(5.0, 5.0)
+        self.assertEqual(w.query_point(point, tolerance), [e for e in entities if e.bounds.contains(point, tolerance)])
+        for e in entities[::3]:
+            w.remove(e.name)
+        self.assertEqual(w.query_point(point, tolerance),
+                         [e for e in w.entities.values() if e.bounds.contains(point, tolerance)])
+
+    def test_nearest(self):
+        rng = random.Random(3)
+        entities = []
+        for i in range(400):
+            x = rng.randint(0, 30) * 0.5
+            y = rng.randint(0, 30) * 0.5
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 0.5)), 0))
+        w = World(entities)
+        for e in entities[::5]:
+            w.remove(e.name)
+        point = Vector(7.3, 6.1)
+        ordered = sorted(w.entities.values(), key=lambda e: (e.bounds.centre() - point).magnitude())
+        for k in [0, 1, 10, 100, 1000]:
+            self.assertEqual(w.nearest(point, k), ordered[:k])
+        self.assertEqual(World([]).nearest(point, 3), [])
+
+    def test_within_radius(self):
+        rng = random.Random(4)
+        entities = []
+        for i in range(400):
+            x = rng.uniform(0.0, 20.0)
+            y = rng.uniform(0.0, 20.0)
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 2.0, y + 1.0)), 0))
+        w = World(entities)
+        point = Vector(10.0, 10.0)
+        for radius in [-1.0, 0.0, 1.0, 4.0, 50.0]:
+            expected = sorted([e for e in entities if (e.bounds.centre() - point).magnitude() <= radius],
+                              key=lambda e: (e.bounds.centre() - point).magnitude())
+            self.assertEqual(w.within_radius(point, radius), expected)
+
+    def test_raycast(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(3.0, 0.0), Vector(4.0, 1.0)), 1)
+        e3 = Entity("Other", Rectangle(Vector(2.0, 2.0), Vector(3.0, 3.0)), 1)
+        w = World([e2, e1, e3])
+        hits = w.raycast(Line(Vector(-1.0, 0.5), Vector(5.0, 0.5)), tolerance)
+        self.assertEqual([e for e, _ in hits], [e1, e2])
+        self.assertTrue(hits[0][1].equals(Vector(0.0, 0.5), tolerance))
+        self.assertTrue(hits[1][1].equals(Vector(3.0, 0.5), tolerance))
+        first = w.raycast(Line(Vector(5.0, 0.5), Vector(-1.0, 0.5)), tolerance, True)
+        self.assertEqual(len(first), 1)
+        self.assertIs(first[0][0], e2)
+        self.assertTrue(first[0][1].equals(Vector(4.0, 0.5), tolerance))
+        # a line starting inside an entity crosses its boundary on the way out
+        hits = w.raycast(Line(Vector(0.5, 0.5), Vector(0.5, 2.0)), tolerance)
+        self.assertEqual([e for e, _ in hits], [e1])
+        self.assertTrue(hits[0][1].equals(Vector(0.5, 1.0), tolerance))
+        self.assertEqual(w.raycast(Line(Vector(-1.0, 5.0), Vector(5.0, 5.0)), tolerance), [])
+        self.assertEqual(World([]).raycast(Line(Vector(-1.0, 5.0), Vector(5.0, 5.0)), tolerance), [])
+        # entities of zero width are crossed, or passed by without testing them if the line starts beyond them
+        p = Entity("p", Rectangle(Vector(1.0, 0.0), Vector(1.0, 2.0)), 1)
+        q = Entity("q", Rectangle(Vector(3.0, 0.0), Vector(4.0, 2.0)), 1)
+        w = World([p, q])
+        self.assertEqual([e for e, _ in w.raycast(Line(Vector(2.0, 1.0), Vector(5.0, 1.0)), tolerance)], [q])
+        hits = w.raycast(Line(Vector(0.0, 1.0), Vector(5.0, 1.0)), tolerance)
+        self.assertEqual([e for e, _ in hits], [p, q])
+        self.assertTrue(hits[0][1].equals(Vector(1.0, 1.0), tolerance))
+
+    def test_raycast_matches_scan(self):
+        rng = random.Random(8)
+        entities = []
+        for i in range(400):
+            x = rng.randint(0, 40) * 0.5
+            y = rng.randint(0, 40) * 0.5
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 0.5)), 0))
+        w = World(entities)
+        for e in entities[::6]:
+            w.remove(e.name)
+        lines = [Line(Vector(rng.uniform(-1.0, 21.0), rng.uniform(-1.0, 21.0)),
+                      Vector(rng.uniform(-1.0, 21.0), rng.uniform(-1.0, 21.0))) for _ in range(50)]
+        lines += [Line(Vector(-1.0, 3.0), Vector(21.0, 3.0)), Line(Vector(4.5, 21.0), Vector(4.5, -1.0))]
+        for line in lines:
+            expected = []
+            for e in w.entities.values():
+                crossings = e.bounds.intersections_with(line, tolerance)
+                if crossings:
+                    expected.append((min((p - line.start_point).magnitude() for p in crossings), e))
+            expected.sort(key=lambda pair: pair[0])
+            hits = w.raycast(line, tolerance)
+            self.assertEqual([e for e, _ in hits], [e for _, e in expected])
+            for (e, point), (d, _) in zip(hits, expected):
+                self.assertAlmostEqual((point - line.start_point).magnitude(), d)
+            self.assertEqual([e for e, _ in w.raycast(line, tolerance, True)], [e for _, e in expected[:1]])
+
+    def test_raycast_resolution(self):
+        rng = random.Random(11)
+        entities = []
+        for i in range(300):
+            x = rng.uniform(0.0, 10.0)
+            y = rng.uniform(0.0, 10.0)
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + rng.uniform(0.1, 1.0), y + 0.5)), 0))
+        w = World(entities, resolution=0.25)
+        lines = [Line(Vector(rng.uniform(-1.0, 11.0), rng.uniform(-1.0, 11.0)),
+                      Vector(rng.uniform(-1.0, 11.0), rng.uniform(-1.0, 11.0))) for _ in range(30)]
+        lines += [Line(Vector(-1.0, 3.1), Vector(11.0, 2.9)), Line(Vector(4.6, 11.0), Vector(4.4, -1.0))]
+        for line in lines:
+            a = fixed.snap_vector(line.start_point, 0.25)
+            z = fixed.snap_vector(line.end_point, 0.25)
+            start = Vector(a[0] * 0.25, a[1] * 0.25)
+            hits = w.raycast(line, 0.0)
+            self.assertEqual(sorted(e.name for e, _ in hits),
+                             sorted(e.name for e in w.entities.values()
+                                    if fixed.crosses_boundary(fixed.snap_rectangle(e.bounds, 0.25), a, z)))
+            distances = [(point - start).magnitude() for _, point in hits]
+            self.assertEqual(distances, sorted(distances))
+            for e, point in hits:
+                self.assertTrue(any(side.bounds.contains(point, tolerance) for side in e.bounds.boundaries()))
+        # a line ending short of an entity by less than the resolution touches it once snapped
+        e = Entity("I", Rectangle(Vector(1.0, 0.0), Vector(2.0, 1.0)), 0)
+        w = World([e], resolution=0.1)
+        hits = w.raycast(Line(Vector(0.0, 0.5), Vector(0.96, 0.5)), 0.0)
+        self.assertEqual([hit for hit, _ in hits], [w.find("I")])
+        self.assertTrue(hits[0][1].equals(Vector(1.0, 0.5), tolerance))
+        self.assertEqual(World([e]).raycast(Line(Vector(0.0, 0.5), Vector(0.96, 0.5)), 0.0), [])
+        # a line snapping to a point on the boundary crosses it there
+        self.assertEqual([hit for hit, _ in w.raycast(Line(Vector(1.51, 0.98), Vector(1.52, 1.01)), 0.0)],
+                         [w.find("I")])
+        self.assertEqual(w.raycast(Line(Vector(1.51, 0.48), Vector(1.52, 0.51)), 0.0), [])
+
+    def test_overlapping_pairs(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.5, 0.5), Vector(2.0, 2.0)), 1)
+        e3 = Entity("Other", Rectangle(Vector(2.0, -1.0), Vector(3.0, 0.5)), 2)
+        e4 = Entity("Far", Rectangle(Vector(10.0, 10.0), Vector(11.0, 11.0)), 2)
+        w = World([e1, e2, e3, e4])
+        self.assertEqual(w.overlapping_pairs(tolerance), [(e1, e2), (e2, e3)])
+        self.assertEqual(w.overlapping_pairs(tolerance, 'same'), [(e1, e2)])
+        self.assertEqual(w.overlapping_pairs(tolerance, 'cross'), [(e2, e3)])
+        w.remove("Thing")
+        self.assertEqual(w.overlapping_pairs(tolerance), [])
+        with self.assertRaises(ValueError):
+            w.overlapping_pairs(tolerance, 'other')
+
+    def test_join(self):
+        rng = random.Random(11)
+        worlds = []
+        for seed in range(2):
+            entities = []
+            for i in range(200):
+                x = rng.randint(0, 20) * 0.5
+                y = rng.randint(0, 20) * 0.5
+                entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 0.5)), 0))
+            worlds.append(World(entities))
+        a, b = worlds
+        for e in list(b.entities.values())[::5]:
+            b.remove(e.name)
+        self.assertEqual(list(a.join(b, 'overlaps', tolerance)),
+                         [(ea, eb) for ea in a.entities.values() for eb in b.entities.values()
+                          if eb.bounds.overlaps(ea.bounds, tolerance)])
+        for t in [tolerance, 0.5]:
+            self.assertEqual(list(a.join(b, 'near', t)),
+                             [(ea, eb) for ea in a.entities.values() for eb in b.entities.values()
+                              if eb.bounds.centre().equals(ea.bounds.centre(), t)])
+        self.assertEqual(list(a.join(b, 'near', 0.0)), [])
+        self.assertEqual(list(a.join(World([]), 'overlaps', tolerance)), [])
+        with self.assertRaises(ValueError):
+            a.join(b, 'touches', tolerance)
+
+    def test_bounds(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(2.0, -1.0), Vector(3.0, 0.5)), 1)
+        w = World([e1, e2])
+        self.assertTrue(w.bounds().equals(Rectangle(Vector(0.0, -1.0), Vector(3.0, 1.0)), tolerance))
+        w.remove("Thing")
+        self.assertTrue(w.bounds().equals(e1.bounds, tolerance))
+        w.add(e2)
+        self.assertTrue(w.bounds().equals(Rectangle(Vector(0.0, -1.0), Vector(3.0, 1.0)), tolerance))
+        w.remove("Thing")
+        w.remove("I")
+        self.assertIsNone(w.bounds())
+
+    def test_aggregates(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.5, 0.0), Vector(1.5, 1.0)), 1)
+        e3 = Entity("Other", Rectangle(Vector(7.0, 7.0), Vector(8.0, 8.0)), 1)
+        w = World([e1, e2, e3])
+        everywhere = Rectangle(Vector(0.0, 0.0), Vector(8.0, 8.0))
+        [top] = w.aggregates(everywhere, 0)
+        self.assertEqual(top.count, 3)
+        self.assertTrue(top.bounds.equals(everywhere, tolerance))
+        self.assertEqual([(a.cell, a.count) for a in w.aggregates(everywhere, 1)], [((0, 0), 2), ((1, 1), 1)])
+        self.assertEqual([a.count for a in w.aggregates(Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)], [2])
+        w.remove("I")
+        [a, _] = w.aggregates(everywhere, 1)
+        self.assertEqual(a.count, 1)
+        self.assertTrue(a.bounds.equals(e2.bounds, tolerance))
+        self.assertTrue(a.centroid().equals(e2.bounds.centre(), tolerance))
+        w.add(e1)
+        w.move("Other", Vector(-7.0, -7.0))
+        self.assertEqual([(a.cell, a.count) for a in w.aggregates(everywhere, 1)], [((0, 0), 3)])
+        self.assertEqual(World([]).aggregates(everywhere, 3), [])
+        # entities added beyond the square of the aggregates grow it rather than being clamped into its edge cells
+        w.add(Entity("Far", Rectangle(Vector(100.0, 100.0), Vector(101.0, 101.0)), 1))
+        around = Rectangle(Vector(99.0, 99.0), Vector(102.0, 102.0))
+        [far] = w.aggregates(around, 3)
+        self.assertEqual(far.count, 1)
+        self.assertTrue(far.bounds.equals(Rectangle(Vector(100.0, 100.0), Vector(101.0, 101.0)), tolerance))
+        self.assertTrue(all(a.bounds.top_right.x <= 8.0 for a in w.aggregates(everywhere, 3)))
+        empty = World([])
+        self.assertEqual(empty.aggregates(everywhere, 3), [])
+        empty.add(e1)
+        empty.add(e3)
+        self.assertEqual([a.count for a in empty.aggregates(everywhere, 1)], [1, 1])
+
+    def test_layer_counts(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(2.0, -1.0), Vector(3.0, 0.5)), 2)
+        e3 = Entity("Other", Rectangle(Vector(4.0, 4.0), Vector(5.0, 5.0)), 1)
+        w = World([e1, e2, e3])
+        self.assertEqual(w.layer_counts(), {1: 2, 2: 1})
+        self.assertTrue(w.bounds([1]).equals(Rectangle(Vector(0.0, 0.0), Vector(5.0, 5.0)), tolerance))
+        self.assertTrue(w.bounds([2]).equals(e2.bounds, tolerance))
+        self.assertIsNone(w.bounds([3]))
+        w.add(Entity("Other", e3.bounds, 2))
+        self.assertEqual(w.layer_counts(), {1: 1, 2: 2})
+        self.assertTrue(w.bounds([1]).equals(e1.bounds, tolerance))
+        self.assertTrue(w.bounds([2]).equals(Rectangle(Vector(2.0, -1.0), Vector(5.0, 5.0)), tolerance))
+        w.remove("I")
+        self.assertEqual(w.layer_counts(), {2: 2})
+        self.assertIsNone(w.bounds([1]))
+        self.assertTrue(w.bounds([1, 2]).equals(w.bounds(), tolerance))
+
+    def test_layer_queries_match_scan(self):
+        rng = random.Random(9)
+        entities = []
+        for i in range(400):
+            x = rng.randint(0, 20) * 0.5
+            y = rng.randint(0, 20) * 0.5
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), rng.randint(0, 3)))
+        w = World(entities)
+        w.query_rect(Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), tolerance, [0, 1, 2, 3])
+        w.find_near_to(entities[0], 0.5, [0, 1, 2, 3])
+        for e in entities[::7]:
+            w.remove(e.name)
+        for e in entities[1::9]:
+            w.add(Entity(e.name, e.bounds, (e.layer + 1) % 4))
+        rect = Rectangle(Vector(2.0, 3.0), Vector(6.0, 5.0))
+        point = Vector(4.2, 6.1)
+        line = Line(Vector(-1.0, 0.3), Vector(11.0, 9.7))
+        for layers in [[0], [1, 3], [2, 2], [5], []]:
+            on_layers = [e for e in w.entities.values() if e.layer in layers]
+            self.assertEqual(w.query_rect(rect, tolerance, layers),
+                             [e for e in on_layers if e.bounds.overlaps(rect, tolerance)])
+            self.assertEqual(w.query_point(point, tolerance, layers),
+                             [e for e in on_layers if e.bounds.contains(point, tolerance)])
+            for e in entities[::11]:
+                self.assertEqual(w.find_near_to(e, 0.5, layers),
+                                 [other for other in on_layers
+                                  if other.bounds.centre().equals(e.bounds.centre(), 0.5) and other.name != e.name])
+            by_distance = sorted(on_layers, key=lambda e: (e.bounds.centre() - point).magnitude())
+            self.assertEqual(w.nearest(point, 10, layers), by_distance[:10])
+            self.assertEqual(w.within_radius(point, 3.0, layers),
+                             [e for e in by_distance if (e.bounds.centre() - point).magnitude() <= 3.0])
+            self.assertEqual([e for e, _ in w.raycast(line, tolerance, False, layers)],
+                             [e for e, _ in w.raycast(line, tolerance) if e.layer in layers])
+
+    def test_find_near_to_many_layers(self):
+        entities = [Entity(str(i), Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), i % 12) for i in range(36)]
+        w = World(entities)
+        layers = range(World.max_grids + 2)
+        for e in entities:
+            self.assertEqual(w.find_near_to(e, tolerance, layers),
+                             [other for other in entities if other.layer in layers and other is not e])
+        # the grid of all entities is filtered rather than one grid kept per layer
+        self.assertEqual(list(w._grids), [(tolerance, None)])
+        for layer in range(World.max_grids + 1):
+            w.find_near_to(entities[0], tolerance, [layer])
+        self.assertEqual(len(w._grids), World.max_grids)
+        # the grids in use are kept over those used least recently
+        w.find_near_to(entities[1], tolerance, [1])
+        w.find_near_to(entities[1], 2.0, [1])
+        self.assertIn((tolerance, 1), w._grids)
+        self.assertNotIn((tolerance, 2), w._grids)
+
+    def test_add(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        w = World([e1])
+        self.assertEqual(w.query_point(Vector(0.5, 0.5), tolerance), [e1])
+        w.add(e2)
+        self.assertIs(w.find("Thing"), e2)
+        self.assertEqual(w.find_near_to(e1, tolerance), [e2])
+        self.assertEqual(w.query_point(Vector(0.5, 0.5), tolerance), [e1, e2])
+
+    def test_move(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 2)
+        w = World([e1, e2])
+        self.assertEqual(w.find_near_to(e1, tolerance), [e2])
+        w.move("Thing", Vector(2.0, 3.0))
+        moved = w.find("Thing")
+        self.assertTrue(moved.bounds.equals(Rectangle(Vector(2.0, 3.0), Vector(3.0, 4.0)), tolerance))
+        self.assertEqual(moved.layer, 2)
+        self.assertEqual(w.find_near_to(e1, tolerance), [])
+        self.assertEqual(w.query_point(Vector(2.5, 3.5), tolerance), [moved])
+        self.assertEqual(list(w.entities.keys()), ["I", "Thing"])
+
+    def test_resize(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(2.0, 2.0)), 1)
+        w = World([e1])
+        w.resize("I", Vector(4.0, 1.0))
+        self.assertTrue(w.find("I").bounds.equals(Rectangle(Vector(-1.0, 0.5), Vector(3.0, 1.5)), tolerance))
+        self.assertEqual(w.query_point(Vector(-0.5, 1.0), tolerance), [w.find("I")])
+
+    def test_snapshot(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e3 = Entity("Other", Rectangle(Vector(5.0, 5.0), Vector(6.0, 6.0)), 2)
+        w = World([e1, e2, e3], hash_quantum=1e-6)
+        w.find_near_to(e1, tolerance)
+        s1 = w.snapshot()
+        w.remove("Thing")
+        w.move("Other", Vector(-5.0, -5.0))
+        s2 = w.snapshot()
+        w.add(Entity("New", e1.bounds, 1))
+        self.assertEqual(list(s1.entities.values()), [e1, e2, e3])
+        self.assertEqual(s1.find_near_to(e1, tolerance), [e2])
+        self.assertEqual(s1.query_point(Vector(5.5, 5.5), tolerance), [e3])
+        self.assertTrue(s1.equals(World([e1, e2, e3]), tolerance))
+        self.assertEqual(s1.content_hash(), World([e1, e2, e3], hash_quantum=1e-6).content_hash())
+        self.assertEqual([e.name for e in s2.find_near_to(e1, tolerance)], ["Other"])
+        self.assertEqual([e.name for e in w.find_near_to(e1, tolerance)], ["Other", "New"])
+        self.assertEqual(s2.take_changes(), set())
+        self.assertEqual(w.take_changes(), {"Thing", "Other", "New"})
+        # versions are worlds in their own right
+        s1.remove("I")
+        self.assertIsNotNone(w.find("I"))
+        self.assertIsNotNone(s2.find("I"))
+
+    def test_snapshot_shares_indexes(self):
+        rng = random.Random(12)
+        entities = []
+        for i in range(600):
+            x = rng.randint(0, 30) * 0.5
+            y = rng.randint(0, 30) * 0.5
+            entities.append(Entity(str(i), Rectangle(Vector(x, y), Vector(x + 1.0, y + 1.0)), i % 3))
+        w = World(entities)
+        w.find_near_to(entities[0], 0.5)
+        w.find_near_to(entities[0], 0.5, [1])
+        w.query_rect(Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), tolerance)
+        w.query_rect(Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), tolerance, [2])
+        s = w.snapshot()
+        self.assertIsNotNone(s._tree)
+        self.assertEqual(set(s._grids), set(w._grids))
+        for e in entities[::3]:
+            w.remove(e.name)
+        for e in entities[1::3]:
+            w.move(e.name, Vector(0.5, -0.5))
+        s2 = w.snapshot()
+        s.remove(entities[2].name)
+        w.add(Entity("new", entities[4].bounds, 1))
+        rect = Rectangle(Vector(3.0, 3.0), Vector(9.0, 7.0))
+        for version in [s, s2, w]:
+            copy = World(list(version.entities.values()))
+            for layers in [None, [1], [2]]:
+                self.assertEqual(version.query_rect(rect, tolerance, layers), copy.query_rect(rect, tolerance, layers))
+                for e in entities[::13]:
+                    self.assertEqual(version.find_near_to(e, 0.5, layers), copy.find_near_to(e, 0.5, layers))
+            self.assertEqual(version.nearest(Vector(7.0, 7.0), 5), copy.nearest(Vector(7.0, 7.0), 5))
+
+    def test_snapshot_resolution(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.01, 0.0), Vector(1.0, 1.0)), 1)
+        w = World([e1, e2], resolution=0.1)
+        s = w.snapshot()
+        w.remove("Thing")
+        self.assertEqual([e.name for e in s.find_near_to(e1, 0.0)], ["Thing"])
+        self.assertEqual(w.find_near_to(e1, 0.0), [])
+
+    def test_snapshot_concurrent_reader(self):
+        entities = [Entity(str(i), Rectangle(Vector(i % 50, i // 50), Vector(i % 50 + 1.0, i // 50 + 1.0)), 0)
+                    for i in range(5000)]
+        w = World(entities)
+        s = w.snapshot()
+        errors = []
+
+        def read():
+            try:
+                for _ in range(20):
+                    assert len(list(s.entities.values())) == 5000
+                    assert len(s.query_rect(Rectangle(Vector(0.0, 0.0), Vector(100.0, 100.0)), tolerance)) == 5000
+            except Exception as e:
+                errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for e in entities[::2]:
+            w.remove(e.name)
+        reader.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(w.entities), 2500)
+        self.assertEqual(len(s.entities), 5000)
+
+    def test_take_changes(self):
+        e1 = Entity("I", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        e2 = Entity("Thing", Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0)), 1)
+        w = World([e1])
+        self.assertEqual(w.take_changes(), set())
+        w.add(e2)
+        w.move("I", Vector(1.0, 0.0))
+        self.assertEqual(w.take_changes(), {"I", "Thing"})
+        w.remove("I")
+        self.assertEqual(w.take_changes(), {"I"})
+        self.assertEqual(w.take_changes(), set())
+
     def test_remove(self):
         name1 = "I"
         bounds1 = Rectangle(Vector(0.0, 0.0), Vector(1.0, 1.0))